@@ -1,6 +1,8 @@
 import streamlit as st
-from ocr import recognize_handwriting
-from llm import ask_llm
+from ocr import recognize_handwriting_pages, is_ocr_error, warmup_yolo_model, WARMUP_YOLO_AT_STARTUP
+from llm import ask_llm, ask_llm_stream
+from tts_stream import speak_text, speak_while_streaming
+from lab_parser import parse_lab_values, flag_lab_values, findings_to_text, findings_table
 from deep_translator import GoogleTranslator
 from gtts import gTTS
 import requests
@@ -11,13 +13,25 @@ import subprocess
 import socket
 import json
 import tempfile
+import hashlib
 from datetime import datetime
 import random
+from concurrent.futures import ThreadPoolExecutor
 st.session_state.inspected = True
 
 # --- Config ---
 st.set_page_config(page_title="Arogya-Sathi", layout="wide", page_icon="🩺")
 
+# Reports with at least this many parsed lab values are summarized from the structured values
+MIN_LAB_FINDINGS_FOR_STRUCTURED_PROMPT = 3
+
+# Report pages are summarized by the LLM in background threads while later pages are OCR'd
+SUMMARY_WORKERS = 2
+
+# Optionally load the handwriting detector before the first upload (no-op after the first run)
+if WARMUP_YOLO_AT_STARTUP:
+    warmup_yolo_model()
+
 # --- Custom CSS for Gradient Background and Interactive UI ---
 st.markdown("""
 <style>
@@ -209,6 +223,39 @@ def text_to_speech(text, lang_code):
         st.error(f"Text-to-speech error: {e}")
         return None
 
+@st.cache_resource
+def get_summary_executor():
+    """Shared threads for summarizing report pages"""
+    return ThreadPoolExecutor(max_workers=SUMMARY_WORKERS)
+
+def cached_summary(key, submit):
+    """LLM summary future for `key`, submitting it once per report per session
+
+    Keys are (document SHA-256, page number or "report", language). Only the
+    current report's summaries are kept, so Streamlit reruns triggered by other
+    tabs reuse them instead of calling the LLM again.
+    """
+    cache = st.session_state.setdefault("report_summaries", {})
+    if any(cached_key[0] != key[0] for cached_key in cache):
+        cache.clear()
+    if key not in cache:
+        cache[key] = submit()
+    return cache[key]
+
+def build_summary_prompt(text):
+    """LLM summary prompt for report text, and the range-flagged lab values it was built from"""
+    lab_findings = flag_lab_values(parse_lab_values(text))
+    # Lab reports: send the parsed, range-flagged values instead of the raw OCR text
+    if len(lab_findings) >= MIN_LAB_FINDINGS_FOR_STRUCTURED_PROMPT:
+        prompt = (
+            "These are lab results from a medical report, converted to standard units and "
+            f"flagged against reference ranges:\n{findings_to_text(lab_findings)}\n"
+            "Can you summarize this in simple terms, explaining any values outside the range?"
+        )
+    else:
+        prompt = f"This is a doctor's note: \"{text}\". Can you summarize this in simple terms?"
+    return prompt, lab_findings
+
 # --- Home Page ---
 def show_home():
     # Language selector in corner
@@ -356,27 +403,75 @@ if option == "🩺 Health Assistant":
         header_text = translate_text("📷 Upload Report", interface_lang_code) if interface_language != "English" else "📷 Upload Report"
         st.header(header_text)
         
-        upload_text = translate_text("Upload an image", interface_lang_code) if interface_language != "English" else "Upload an image"
-        uploaded_file = st.file_uploader(upload_text, type=["png", "jpg", "jpeg"])
+        upload_text = translate_text("Upload an image or PDF", interface_lang_code) if interface_language != "English" else "Upload an image or PDF"
+        uploaded_file = st.file_uploader(upload_text, type=["png", "jpg", "jpeg", "pdf"])
         
         if uploaded_file:
-            st.image(uploaded_file, caption=translate_text("Uploaded Note", interface_lang_code), use_container_width=True)
+            is_pdf = uploaded_file.name.lower().endswith(".pdf")
+            if not is_pdf:
+                st.image(uploaded_file, caption=translate_text("Uploaded Note", interface_lang_code), use_container_width=True)
+            st.subheader(translate_text("📝 Extracted Text", interface_lang_code))
+            
+            # Show each page as soon as it is read and summarize it in the background
+            # while the following pages are still being OCR'd
+            ocr_stats = {}
+            page_texts = []
+            page_summaries = []
+            summary_executor = get_summary_executor()
+            doc_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
             with st.spinner(translate_text("Reading report...", interface_lang_code)):
-                extracted_text = recognize_handwriting(uploaded_file)
-                st.subheader(translate_text("📝 Extracted Text", interface_lang_code))
-                st.write(extracted_text)
-                
-                if interface_language != "English":
-                    translated_extraction = translate_text(extracted_text, interface_lang_code)
-                    st.write(f"**{translate_text('Translated Extraction', interface_lang_code)}:**")
-                    st.write(translated_extraction)
-                    if enable_tts:
-                        audio_path = text_to_speech(translated_extraction, interface_lang_code)
-                        if audio_path:
-                            st.audio(audio_path)
+                for page_number, page_text in recognize_handwriting_pages(uploaded_file, stats=ocr_stats):
+                    if is_pdf and page_number is not None:
+                        st.markdown(f"**{translate_text('Page', interface_lang_code)} {page_number}**")
+                    st.write(page_text)
+                    page_texts.append(page_text)
+                    if page_number is not None and page_text.strip() and not is_ocr_error(page_text):
+                        page_prompt, _ = build_summary_prompt(page_text)
+                        page_summaries.append((page_number, cached_summary(
+                            (doc_hash, page_number, interface_lang_code),
+                            lambda: summary_executor.submit(ask_llm, page_prompt),
+                        )))
+            extracted_text = "\n\n".join(page_texts)
+            
+            if ocr_stats.get("cache_hits") and not ocr_stats.get("cache_misses"):
+                st.caption("⚡ " + translate_text("Loaded from OCR cache", interface_lang_code))
+            if ocr_stats.get("confidence") is not None:
+                ocr_caption = translate_text("OCR confidence", interface_lang_code) + f": {ocr_stats['confidence']:.0f}%"
+                if ocr_stats.get("language"):
+                    ocr_caption += f" · tesseract -l {ocr_stats['language']}"
+                st.caption(ocr_caption)
+            
+            if interface_language != "English":
+                translated_extraction = translate_text(extracted_text, interface_lang_code)
+                st.write(f"**{translate_text('Translated Extraction', interface_lang_code)}:**")
+                st.write(translated_extraction)
+                if enable_tts:
+                    audio_path = text_to_speech(translated_extraction, interface_lang_code)
+                    if audio_path:
+                        st.audio(audio_path)
+
+            # Lab reports: show the parsed, range-flagged values for the whole report
+            summary_prompt, lab_findings = build_summary_prompt(extracted_text)
+            if len(lab_findings) >= MIN_LAB_FINDINGS_FOR_STRUCTURED_PROMPT:
+                st.subheader(translate_text("🧪 Lab Values", interface_lang_code))
+                st.dataframe(findings_table(lab_findings), hide_index=True)
 
             with st.spinner(translate_text("Summarizing with LLM...", interface_lang_code)):
-                summary = ask_llm(f"This is a doctor's note: \"{extracted_text}\". Can you summarize this in simple terms?")
+                summaries = [(page_number, future.result()) for page_number, future in page_summaries]
+                report_key = (doc_hash, "report", interface_lang_code)
+                if len(summaries) == 1:
+                    summary = summaries[0][1]
+                elif summaries:
+                    # Multi-page reports: merge the page summaries that were prepared during OCR,
+                    # labelled with their real page numbers (blank pages are not summarized)
+                    page_notes = "\n\n".join(f"Page {page_number}: {text}" for page_number, text in summaries)
+                    merge_prompt = (
+                        f"These are summaries of the pages of one medical report, in order:\n{page_notes}\n"
+                        "Combine them into one short summary in simple terms, keeping any values outside the normal range."
+                    )
+                    summary = cached_summary(report_key, lambda: summary_executor.submit(ask_llm, merge_prompt)).result()
+                else:
+                    summary = cached_summary(report_key, lambda: summary_executor.submit(ask_llm, summary_prompt)).result()
                 st.subheader(translate_text("🧠 Summary", interface_lang_code))
                 st.write(summary)
                 if interface_language != "English":
@@ -918,13 +1013,6 @@ elif option == "🧠 Deep Analysis":
                     """
                     
                     try:
-                        # Translate prompt if needed
-                        if interface_language != "English":
-                            eng_prompt = translate_text(comprehensive_prompt, "en")
-                            analysis = ask_llm(eng_prompt)
-                        else:
-                            analysis = ask_llm(comprehensive_prompt)
-                        
                         # Create detailed results display
                         result_tab, profile_tab, doctor_tab, emergency_tab = st.tabs([
                             translate_text("🔍 Comprehensive Analysis", interface_lang_code) if interface_language != "English" else "🔍 Comprehensive Analysis",
@@ -933,12 +1021,23 @@ elif option == "🧠 Deep Analysis":
                             translate_text("🚨 Emergency Info", interface_lang_code) if interface_language != "English" else "🚨 Emergency Info"])
                         
                         with result_tab:
+                            # Audio players go above the text so speech can start while it streams
+                            audio_container = st.container()
+                            
                             # Translate and display analysis if needed
                             if interface_language != "English":
+                                eng_prompt = translate_text(comprehensive_prompt, "en")
+                                analysis = ask_llm(eng_prompt)
                                 translated_analysis = translate_text(analysis, interface_lang_code)
                                 st.markdown(translated_analysis)
+                                if enable_tts:
+                                    speak_text(translated_analysis, interface_lang_code, audio_container)
                             else:
-                                st.markdown(analysis)
+                                # Stream the answer; with TTS on, sentences are spoken as they arrive
+                                analysis_stream = ask_llm_stream(comprehensive_prompt)
+                                if enable_tts:
+                                    analysis_stream = speak_while_streaming(analysis_stream, interface_lang_code, audio_container)
+                                analysis = st.write_stream(analysis_stream)
                             
                             # Download report button
                             if st.button(translate_text("📄 Download Full Report", interface_lang_code) if interface_language != "English" else "📄 Download Full Report"):
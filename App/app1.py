@@ -1,12 +1,10 @@
 import streamlit as st
-from ultralytics import YOLO
 import random
 import PIL
 from PIL import Image, ImageOps
 import numpy as np
 import torchvision
-import torch
-import os
+import hashlib
 
 # Set page config at the very beginning
 st.set_page_config(
@@ -16,19 +14,127 @@ st.set_page_config(
 )
 
 from sidebar import Sidebar
-import rcnnres, vgg
+import rcnnres
+from model_registry import (build_xray_registry, registry_name, predict_yolo_batch, PredictionCache,
+                            WARMUP_MODELS_AT_STARTUP, XRAY_MODEL_NAMES, YOLO_WEIGHTS_PATH)
 # hide deprication warnings which directly don't affect the working of the application
 import warnings
 warnings.filterwarnings("ignore")
 
 
 
+@st.cache_resource
+def get_model_registry():
+    """One registry per process: models load once and survive reruns"""
+    registry = build_xray_registry()
+    if WARMUP_MODELS_AT_STARTUP:
+        registry.warmup(XRAY_MODEL_NAMES)
+    return registry
+
+
+# YOLO keeps detections down to this score in its cached raw output; the slider filters above it
+RAW_PREDICTION_MIN_CONF = 0.01
+
+# Batch inference letterboxes images, so its boxes can differ slightly from the single-image view;
+# the two paths keep separate cache entries for the same image
+SINGLE_PREDICTION = "single"
+BATCH_PREDICTION = "batch"
+
+
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache()
+
+
+def cached_raw_prediction(key, predict):
+    """Raw predictions for (image hash, model, backend, path), running `predict` only on a cache miss"""
+    cache = get_prediction_cache()
+    prediction = cache.get(key)
+    if prediction is not None:
+        return prediction, True
+    prediction = predict()
+    cache.put(key, prediction)
+    return prediction, False
+
+
+def show_cache_status(cache_hit):
+    if cache_hit:
+        st.caption("⚡ Cached prediction: only the confidence threshold was re-applied")
+    else:
+        st.caption("Model inference ran for this image")
+
+
+BATCH_GRID_COLUMNS = 3
+
+
+def show_batch_results(uploaded_images, model, backend, conf_threshold):
+    """Run all uploaded X-rays through the model in batches and show the detections in a grid"""
+    st.write(f"You selected {len(uploaded_images)} images")
+    keys = [(hashlib.sha256(f.getvalue()).hexdigest(), model, backend, BATCH_PREDICTION) for f in uploaded_images]
+    if st.button("Execution"):
+        st.session_state.executed_prediction = keys
+    if st.session_state.get("executed_prediction") != keys:
+        return
+
+    # Raw predictions share the single-image cache under their own path marker; only the misses are batched
+    cache = get_prediction_cache()
+    raw_predictions = [cache.get(key) for key in keys]
+    missing = [i for i, prediction in enumerate(raw_predictions) if prediction is None]
+
+    # Images are decoded only when needed: for inference on cache misses and for drawing R-CNN boxes
+    images = {}
+
+    def decoded(index):
+        if index not in images:
+            images[index] = PIL.Image.open(uploaded_images[index]).convert("RGB")
+        return images[index]
+
+    if missing:
+        with st.spinner(f"Running {len(missing)} images..."):
+            detector = get_model_registry().get(registry_name(model, backend))
+            batch = [decoded(i) for i in missing]
+            if model == 'YoloV8':
+                new_predictions = predict_yolo_batch(detector, batch, conf=RAW_PREDICTION_MIN_CONF,
+                                                     augment=True, max_det=1)
+            else:
+                new_predictions = rcnnres.predict_batch(detector, batch)
+            for i, prediction in zip(missing, new_predictions):
+                raw_predictions[i] = [prediction]
+                cache.put(keys[i], raw_predictions[i])
+
+    columns = st.columns(BATCH_GRID_COLUMNS)
+    for index, (uploaded, raw_prediction) in enumerate(zip(uploaded_images, raw_predictions)):
+        with columns[index % BATCH_GRID_COLUMNS]:
+            if model == 'YoloV8':
+                result = raw_prediction[0][raw_prediction[0].boxes.conf > conf_threshold]
+                st.image(result.plot()[:, :, ::-1], use_container_width=True)
+                label = "No Detection"
+                if len(result.boxes):
+                    label = f"{result.names[int(result.boxes.cls[0])]} ({result.boxes.conf[0].item():.2f})"
+            else:
+                output = rcnnres.filter_prediction(raw_prediction[0], conf_threshold)
+                detected_image, class_name = rcnnres.plot_image_from_output(np.asarray(decoded(index)), output)
+                st.image(detected_image, use_container_width=True)
+                label = f"{class_name} ({output['scores'].max().item():.2f})" if class_name else "No Detection"
+            st.caption(f"{uploaded.name}: {label}")
+
+    with st.expander("Detection Results"):
+        st.caption(f"⚡ {len(keys) - len(missing)} of {len(keys)} predictions came from the cache")
+        for uploaded, raw_prediction in zip(uploaded_images, raw_predictions):
+            st.write(uploaded.name)
+            if model == 'YoloV8':
+                st.write(raw_prediction[0][raw_prediction[0].boxes.conf > conf_threshold].boxes)
+            else:
+                st.write(rcnnres.filter_prediction(raw_prediction[0], conf_threshold))
+
+
 # Sidebar
 sb = Sidebar()
 
 
 model = sb.model_name
 conf_threshold = sb.confidence_threshold
+backend = sb.backend
 
 
 
@@ -97,9 +203,6 @@ with tab2:
    
    
    
-#weights
-yolo_path = os.path.join("weights", "yolov8.pt")
-
    
 with tab1:
     st.markdown("### Upload & Test")
@@ -112,18 +215,25 @@ with tab1:
 
     st.button('Upload Image', on_click=set_clicked)
     if st.session_state.clicked:
-        image = st.file_uploader("", type=["jpg", "png"])
+        uploaded_images = st.file_uploader("", type=["jpg", "png"], accept_multiple_files=True)
+        # One image keeps the detailed side-by-side view; several go through the batch grid
+        image = uploaded_images[0] if len(uploaded_images) == 1 else None
+        if len(uploaded_images) > 1:
+            show_batch_results(uploaded_images, model, backend, conf_threshold)
         
         
         if image is not None:
             st.write("You selected the file:", image.name)
+
+            # Raw predictions are cached per (image, model) and thresholded afterwards, so once
+            # Execution has run, moving the slider re-filters the boxes without re-running the model
+            prediction_key = (hashlib.sha256(image.getvalue()).hexdigest(), model, backend, SINGLE_PREDICTION)
             
             if model == 'YoloV8':
                 try:
-                    yolo_detection_model = YOLO(yolo_path)
-                    yolo_detection_model.load()
+                    yolo_detection_model = get_model_registry().get(registry_name(model, backend))
                 except Exception as ex:
-                    st.error(f"Unable to load model. Check the specified path: {yolo_path}")
+                    st.error(f"Unable to load model. Check the specified path: {YOLO_WEIGHTS_PATH}")
                     st.error(ex)
                 
                 col1, col2 = st.columns(2)
@@ -139,9 +249,15 @@ with tab1:
 
                     if uploaded_image:
                         if st.button("Execution"):
+                            st.session_state.executed_prediction = prediction_key
+                        if st.session_state.get("executed_prediction") == prediction_key:
                             with st.spinner("Running..."):
-                                res = yolo_detection_model.predict(uploaded_image,
-                                                    conf=conf_threshold, augment=True, max_det=1)
+                                raw_res, cache_hit = cached_raw_prediction(
+                                    prediction_key,
+                                    lambda: yolo_detection_model.predict(uploaded_image,
+                                                    conf=RAW_PREDICTION_MIN_CONF, augment=True, max_det=1)
+                                )
+                                res = [r[r.boxes.conf > conf_threshold] for r in raw_res]
                                 boxes = res[0].boxes
                                 res_plotted = res[0].plot()[:, :, ::-1]
                                 
@@ -161,6 +277,7 @@ with tab1:
                                                 use_container_width=True)
                                         try:
                                             with st.expander("Detection Results"):
+                                                show_cache_status(cache_hit)
                                                 for box in boxes:
                                                     st.write(pred_class_label)
                                                     st.write(probs)
@@ -176,6 +293,7 @@ with tab1:
                                                 use_container_width=True)
                                         try:
                                             with st.expander("Detection Results"):
+                                                show_cache_status(cache_hit)
                                                 st.write("No Detection")
                                             #st.write(output[2])
                                         except Exception as ex:
@@ -184,9 +302,7 @@ with tab1:
                                     
                                         
             elif model == 'FastRCNN with ResNet':
-                resnet_model = rcnnres.get_model()
-                device = torch.device('cpu')
-                resnet_model.to(device)
+                resnet_model = get_model_registry().get(registry_name(model, backend))
 
                 
                 col1, col2 = st.columns(2)
@@ -203,23 +319,28 @@ with tab1:
                     content = Image.open(image).convert("RGB")
                     to_tensor = torchvision.transforms.ToTensor()
                     content = to_tensor(content).unsqueeze(0)
-                    content.half()
 
                     if uploaded_image:
                         if st.button("Execution"):
+                            st.session_state.executed_prediction = prediction_key
+                        if st.session_state.get("executed_prediction") == prediction_key:
                             with st.spinner("Running..."):
-                                output = rcnnres.make_prediction(resnet_model, content, conf_threshold)
+                                raw_output, cache_hit = cached_raw_prediction(
+                                    prediction_key, lambda: rcnnres.predict_raw(resnet_model, content)
+                                )
+                                output = [rcnnres.filter_prediction(pred, conf_threshold) for pred in raw_output]
                                 
                                 print(output[0])
 
-                                fig, _ax, class_name = rcnnres.plot_image_from_output(content[0].detach(), output[0])
+                                detected_image, class_name = rcnnres.plot_image_from_output(content[0], output[0])
 
                                 with col2:
-                                    st.image(rcnnres.figure_to_array(fig),
+                                    st.image(detected_image,
                                             caption="Detected Image",
                                             use_container_width=True)
                                     try:
                                         with st.expander("Detection Results"):
+                                            show_cache_status(cache_hit)
                                             st.write(class_name)
                                             st.write(output)
                                             #st.write(output[2])
@@ -228,9 +349,7 @@ with tab1:
                                         st.write(ex)
 
             elif model == 'VGG16':
-                vgg_model = vgg.get_vgg_model()
-                device = torch.device('cpu')
-                vgg_model.to(device)
+                vgg_model = get_model_registry().get(registry_name(model, backend))
                 
                 col1, col2 = st.columns(2)
 
@@ -246,23 +365,28 @@ with tab1:
                     content = Image.open(image).convert("RGB")
                     to_tensor = torchvision.transforms.ToTensor()
                     content = to_tensor(content).unsqueeze(0)
-                    content.half()
 
                     if uploaded_image:
                         if st.button("Execution"):
+                            st.session_state.executed_prediction = prediction_key
+                        if st.session_state.get("executed_prediction") == prediction_key:
                             with st.spinner("Running..."):
-                                output = rcnnres.make_prediction(vgg_model, content, conf_threshold)
+                                raw_output, cache_hit = cached_raw_prediction(
+                                    prediction_key, lambda: rcnnres.predict_raw(vgg_model, content)
+                                )
+                                output = [rcnnres.filter_prediction(pred, conf_threshold) for pred in raw_output]
                                 
                                 print(output[0])
 
-                                fig, _ax, class_name = rcnnres.plot_image_from_output(content[0].detach(), output[0])
+                                detected_image, class_name = rcnnres.plot_image_from_output(content[0], output[0])
 
                                 with col2:
-                                    st.image(rcnnres.figure_to_array(fig),
+                                    st.image(detected_image,
                                             caption="Detected Image",
                                             use_container_width=True)
                                     try:
                                         with st.expander("Detection Results"):
+                                            show_cache_status(cache_hit)
                                             st.write(class_name)
                                             st.write(output)
                                             #st.write(output[2])
@@ -8,7 +8,8 @@ from fpdf import FPDF
 # Import with error handling
 try:
     from deep_translator import GoogleTranslator
-    from llm import ask_llm  # Your custom module
+    from llm import ask_llm, ask_llm_stream  # Your custom module
+    from tts_stream import speak_text, speak_while_streaming
 except ImportError as e:
     st.error(f"Missing required package: {e}")
     st.stop()
@@ -161,6 +162,7 @@ with tab1:
     country = st.text_input(_("Country or Community"), placeholder=_("e.g. India, USA"))
 
     st.subheader(_("Output Preferences"))
+    read_aloud = st.checkbox(_("🔊 Read the plan aloud"), value=False)
     generate_button = st.button(_("Generate Health Recommendations"))
 
 if generate_button:
@@ -193,17 +195,28 @@ Include:
 Use markdown headers (##) and structured formatting.
 """
             try:
-                response = ask_llm(prompt)
                 with tab2:
-                    st.success(_("✅ Recommendations generated!"))
                     st.markdown("## 🧾 " + _("AI-Generated Health Plan"))
-                    st.markdown(response)
-
-                    if lang_code != "en":
+                    # Audio players sit above the plan so speech can start while it streams
+                    audio_container = st.container()
+
+                    if lang_code == "en":
+                        # Stream the plan; with read-aloud on, sentences are spoken as they arrive
+                        plan_stream = ask_llm_stream(prompt)
+                        if read_aloud:
+                            plan_stream = speak_while_streaming(plan_stream, lang_code, audio_container)
+                        response = st.write_stream(plan_stream)
+                    else:
+                        response = ask_llm(prompt)
+                        st.markdown(response)
                         with st.spinner(_(f"Translating to {language}...")):
                             translated = translate_text(response, lang_code)
                             st.markdown("## 🌐 " + _(f"Translated Output ({language})"))
                             st.markdown(translated)
+                        if read_aloud:
+                            speak_text(translated, lang_code, audio_container)
+
+                    st.success(_("✅ Recommendations generated!"))
 
                     with st.spinner(_("Preparing PDF download...")):
                         pdf_path = generate_pdf(response, user_data)
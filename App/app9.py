@@ -8,8 +8,9 @@ from dataclasses import dataclass, asdict
 import uuid
 import requests
 import os
-import tempfile
-import base64
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from audio_store import AudioStore
 try:
     from gtts import gTTS
     import pyttsx3
@@ -43,46 +44,80 @@ def get_gtts_language_code(lang_code: str) -> str:
     }
     return gtts_mapping.get(lang_code, "en")
 
-def text_to_speech_gtts(text: str, lang_code: str) -> str:
-    """Convert text to speech using gTTS and return base64 audio"""
-    if not GTTS_AVAILABLE:
-        return None
+def synthesize_speech(text: str, lang_code: str) -> bytes:
+    """Run gTTS and return MP3 bytes; raises on failure and never touches the UI,
+    so it is safe to call from worker threads"""
+    # Get appropriate language code for gTTS
+    gtts_lang = get_gtts_language_code(lang_code)
     
+    # Create gTTS object and write straight into memory
+    tts = gTTS(text=text, lang=gtts_lang, slow=False)
+    audio_buffer = BytesIO()
+    tts.write_to_fp(audio_buffer)
+    
+    return audio_buffer.getvalue()
+
+@st.cache_resource
+def get_audio_store():
+    """Process-wide LRU store for generated clips; history keeps only clip IDs"""
+    return AudioStore()
+
+# Background TTS: messages are shown as soon as they are translated and the
+# audio is attached to the conversation history once the worker finishes.
+TTS_WORKERS = 4
+
+@st.cache_resource
+def get_tts_executor():
+    """Process-wide worker pool shared by all sessions for audio generation"""
+    return ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+def generate_audio_background(store: AudioStore, text: str, lang_code: str) -> str:
+    """Worker task: synthesize and store audio, returning its ID (None instead of raising)"""
     try:
-        # Get appropriate language code for gTTS
-        gtts_lang = get_gtts_language_code(lang_code)
-        
-        # Create gTTS object
-        tts = gTTS(text=text, lang=gtts_lang, slow=False)
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-            tts.save(tmp_file.name)
-            
-            # Read the audio file and encode as base64
-            with open(tmp_file.name, "rb") as audio_file:
-                audio_bytes = audio_file.read()
-                audio_base64 = base64.b64encode(audio_bytes).decode()
-            
-            # Clean up temp file
-            os.unlink(tmp_file.name)
-            
-            return audio_base64
-            
+        return store.put(synthesize_speech(text, lang_code))
     except Exception as e:
-        st.error(f"TTS Error: {str(e)}")
+        print(f"TTS Error: {e}")
         return None
 
-def create_audio_player(audio_base64: str, key: str = None):
-    """Create an audio player widget for the base64 encoded audio"""
-    if audio_base64:
-        audio_html = f"""
-        <audio controls style="width: 100%;">
-            <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-            Your browser does not support the audio element.
-        </audio>
-        """
-        st.markdown(audio_html, unsafe_allow_html=True)
+def submit_audio_job(msg_id: str, field: str, text: str, lang_code: str):
+    """Queue audio generation for one field ('audio_original'/'audio_translated') of a message"""
+    # Cached resources are resolved here on the script thread, never inside the worker
+    future = get_tts_executor().submit(generate_audio_background, get_audio_store(), text, lang_code)
+    st.session_state.pending_audio[f"{msg_id}:{field}"] = future
+
+def collect_ready_audio():
+    """Attach finished background audio to its messages in the conversation history"""
+    pending = st.session_state.pending_audio
+    if not pending:
+        return
+    
+    messages = {msg['id']: msg for msg in st.session_state.conversation_history}
+    for job_key, future in list(pending.items()):
+        if not future.done():
+            continue
+        del pending[job_key]
+        msg_id, field = job_key.split(":", 1)
+        if msg_id in messages:
+            messages[msg_id][field] = future.result()
+
+@st.fragment(run_every="1s")
+def poll_pending_audio(job_key: str):
+    """Placeholder for audio still being generated; reruns the app once it is ready"""
+    future = st.session_state.pending_audio.get(job_key)
+    if future is None or future.done():
+        st.rerun()
+    st.caption("⏳ Generating audio...")
+
+def create_audio_player(audio_id: str, key: str = None):
+    """Create an audio player widget for a clip in the audio store"""
+    if audio_id:
+        audio_bytes = get_audio_store().get(audio_id)
+        if audio_bytes is None:
+            st.caption("Audio expired from cache.")
+            return
+        # st.audio registers the clip with Streamlit's media file manager, so the
+        # browser fetches it once by URL instead of receiving it on every rerun
+        st.audio(audio_bytes, format="audio/mp3")
 
 def text_to_speech_offline(text: str, lang_code: str = "en"):
     """Offline TTS using pyttsx3 (fallback option)"""
@@ -376,8 +411,8 @@ class ConversationMessage:
     translated_content: str
     target_language: str
     timestamp: str
-    audio_original: str = None  # Base64 encoded audio
-    audio_translated: str = None  # Base64 encoded audio
+    audio_original: str = None  # Audio store ID
+    audio_translated: str = None  # Audio store ID
 
 class MedicalTranslationApp:
     def __init__(self):
@@ -387,21 +422,13 @@ class MedicalTranslationApp:
             st.session_state.current_session_id = str(uuid.uuid4())
         if 'analysis_reports' not in st.session_state:
             st.session_state.analysis_reports = []
+        if 'pending_audio' not in st.session_state:
+            st.session_state.pending_audio = {}
 
     def add_message(self, speaker: str, content: str, original_lang: str, target_lang: str, enable_tts: bool = True):
         """Add a new message to the conversation with optional TTS"""
         translated_content = translate_text(content, original_lang, target_lang)
         
-        # Generate TTS audio if enabled
-        audio_original = None
-        audio_translated = None
-        
-        if enable_tts and GTTS_AVAILABLE:
-            with st.spinner("Generating audio..."):
-                audio_original = text_to_speech_gtts(content, original_lang)
-                if translated_content and not translated_content.startswith("[Translation Error"):
-                    audio_translated = text_to_speech_gtts(translated_content, target_lang)
-        
         message = ConversationMessage(
             id=str(uuid.uuid4()),
             speaker=speaker,
@@ -409,12 +436,29 @@ class MedicalTranslationApp:
             original_language=original_lang,
             translated_content=translated_content,
             target_language=target_lang,
-            timestamp=datetime.datetime.now().isoformat(),
-            audio_original=audio_original,
-            audio_translated=audio_translated
+            timestamp=datetime.datetime.now().isoformat()
         )
         
         st.session_state.conversation_history.append(asdict(message))
+        
+        # Generate TTS audio in the background if enabled
+        if enable_tts and GTTS_AVAILABLE:
+            submit_audio_job(message.id, 'audio_original', content, original_lang)
+            if translated_content and not translated_content.startswith("[Translation Error"):
+                submit_audio_job(message.id, 'audio_translated', translated_content, target_lang)
+
+    def render_audio(self, msg: Dict, field: str, label: str):
+        """Show the audio player for a message field, or a placeholder while it is generated"""
+        if not GTTS_AVAILABLE:
+            return
+        
+        job_key = f"{msg['id']}:{field}"
+        if msg.get(field):
+            st.markdown(f"🔊 **{label}:**")
+            create_audio_player(msg[field], key=job_key)
+        elif job_key in st.session_state.pending_audio:
+            st.markdown(f"🔊 **{label}:**")
+            poll_pending_audio(job_key)
 
     def display_conversation(self):
         """Display the conversation history with translations and audio"""
@@ -424,6 +468,8 @@ class MedicalTranslationApp:
             st.info("No conversation yet. Start by adding messages below.")
             return
         
+        collect_ready_audio()
+        
         for msg in st.session_state.conversation_history:
             speaker_icon = "👨‍⚕️" if msg['speaker'] == 'doctor' else "🤒"
             
@@ -435,9 +481,7 @@ class MedicalTranslationApp:
                     st.write(msg['content'])
                     
                     # Audio player for original message
-                    if msg.get('audio_original') and GTTS_AVAILABLE:
-                        st.markdown("🔊 **Listen (Original):**")
-                        create_audio_player(msg['audio_original'], key=f"orig_{msg['id']}")
+                    self.render_audio(msg, 'audio_original', "Listen (Original)")
                     
                     st.caption(f"Time: {msg['timestamp'][:19]}")
                 
@@ -446,9 +490,7 @@ class MedicalTranslationApp:
                     st.write(msg['translated_content'])
                     
                     # Audio player for translated message
-                    if msg.get('audio_translated') and GTTS_AVAILABLE:
-                        st.markdown("🔊 **Listen (Translation):**")
-                        create_audio_player(msg['audio_translated'], key=f"trans_{msg['id']}")
+                    self.render_audio(msg, 'audio_translated', "Listen (Translation)")
                 
                 st.divider()
         
@@ -617,6 +659,7 @@ def main():
         
         if st.button("🔄 New Session"):
             st.session_state.conversation_history = []
+            st.session_state.pending_audio = {}
             st.session_state.current_session_id = str(uuid.uuid4())
             st.rerun()
         
@@ -0,0 +1,53 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Default memory budget for all stored clips across sessions (bytes)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class AudioStore():
+    """Bounded in-memory LRU store for generated audio clips.
+
+    Conversation history keeps only the clip ID returned by put(); the bytes
+    live here, shared by every session in the process, and are evicted oldest
+    first once the byte budget is exceeded.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._clips = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, audio_bytes):
+        """Store a clip and return its ID (content hash, so repeats are shared)"""
+        audio_id = hashlib.sha1(audio_bytes).hexdigest()
+
+        with self._lock:
+            if audio_id in self._clips:
+                self._clips.move_to_end(audio_id)
+                return audio_id
+
+            self._clips[audio_id] = audio_bytes
+            self.total_bytes += len(audio_bytes)
+
+            # Evict least recently used clips, but always keep the newest one
+            while self.total_bytes > self.max_bytes and len(self._clips) > 1:
+                _, evicted = self._clips.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+        return audio_id
+
+    def get(self, audio_id):
+        """Return the clip bytes, or None if the ID is unknown or was evicted"""
+        with self._lock:
+            audio_bytes = self._clips.get(audio_id)
+            if audio_bytes is not None:
+                self._clips.move_to_end(audio_id)
+            return audio_bytes
+
+    def stats(self):
+        """Current number of clips and bytes held"""
+        with self._lock:
+            return {"clips": len(self._clips), "bytes": self.total_bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,154 @@
+"""Bulk medical-document ingestion: OCR a folder of reports into a JSONL file.
+
+Run from the App directory, e.g.:
+    python batch_ocr.py /data/scans --output results.jsonl --workers 4
+
+Each line of the output holds one document's text, extracted medications and
+lab values, per-stage timings and any error. The output file doubles as the
+checkpoint: re-running the same command skips documents already written
+successfully and retries the ones that failed (--no-retry-errors skips those
+too). A retried document gets a new line; the last line for a path wins.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import ocr
+
+STAGES = ("read", "ocr", "entities")
+PROGRESS_EVERY = 25  # Print a progress line every N documents
+
+
+def find_documents(input_dir):
+    """Walk the folder and yield supported documents in a stable order"""
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in ocr.SUPPORTED_EXTENSIONS:
+                yield os.path.join(root, name)
+
+
+def load_checkpoint(output_path, retry_errors=True):
+    """Paths already done in the output file (a partially written last line is ignored)
+
+    With retry_errors, a path only counts as done when its latest record has no error.
+    """
+    succeeded = {}
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                succeeded[record["path"]] = "error" not in record
+            except (ValueError, KeyError, TypeError):
+                continue
+    return {path for path, ok in succeeded.items() if ok or not retry_errors}
+
+
+def init_worker(use_cache):
+    """Per-process setup: pages are OCR'd serially inside each worker"""
+    ocr.OCR_CACHE_ENABLED = use_cache
+
+
+def process_document(path):
+    """OCR one document and extract entities; runs in a worker process"""
+    timings = {}
+    record = {"path": path}
+    try:
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            file_bytes = f.read()
+        timings["read"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = {}
+        # The batch already runs one document per worker, so no nested page pool
+        text = ocr.recognize_document(file_bytes, path, parallelism=1, stats=stats)
+        timings["ocr"] = time.perf_counter() - start
+        if ocr.is_ocr_error(text):
+            record["error"] = text
+
+        start = time.perf_counter()
+        entities = ocr.extract_medical_entities(text)
+        timings["entities"] = time.perf_counter() - start
+
+        record.update({
+            "text": text,
+            "medications": entities["medications"],
+            "lab_values": entities["lab_values"],
+            "ocr_stats": stats,
+        })
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["timings"] = timings
+    return record
+
+
+def report(processed, errors, stage_totals, elapsed):
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {processed} documents ({errors} errors) in {elapsed:.1f}s - {rate:.2f} docs/sec")
+    if processed:
+        per_stage = ", ".join(f"{stage} {stage_totals[stage] / processed * 1000:.0f} ms" for stage in STAGES)
+        print(f"Mean per-document stage time: {per_stage}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR a folder of medical documents into JSONL.")
+    parser.add_argument("input_dir", help="folder of PDF, DOCX and image files (searched recursively)")
+    parser.add_argument("--output", default="ocr_results.jsonl", help="JSONL output, also used to resume")
+    parser.add_argument("--workers", type=int, default=ocr.OCR_MAX_WORKERS, help="worker processes")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the OCR result cache")
+    parser.add_argument("--retry-errors", action=argparse.BooleanOptionalAction, default=True,
+                        help="re-run documents whose last record in the output has an error")
+    args = parser.parse_args()
+
+    done = load_checkpoint(args.output, args.retry_errors)
+    pending_paths = (path for path in find_documents(args.input_dir) if path not in done)
+    if done:
+        print(f"Resuming: {len(done)} documents already in {args.output}")
+
+    processed = errors = 0
+    stage_totals = dict.fromkeys(STAGES, 0.0)
+    start = time.perf_counter()
+
+    with open(args.output, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                initargs=(not args.no_cache,)) as pool:
+        # Keep a bounded number of documents in flight so huge folders stream through
+        in_flight = set()
+        max_in_flight = args.workers * 2
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < max_in_flight:
+                path = next(pending_paths, None)
+                if path is None:
+                    exhausted = True
+                else:
+                    in_flight.add(pool.submit(process_document, path))
+            if not in_flight:
+                break
+
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                # One flushed line per document is the checkpoint
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+                processed += 1
+                errors += "error" in record
+                for stage, seconds in record["timings"].items():
+                    stage_totals[stage] += seconds
+                if processed % PROGRESS_EVERY == 0:
+                    report(processed, errors, stage_totals, time.perf_counter() - start)
+
+    report(processed, errors, stage_totals, time.perf_counter() - start)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Benchmark lexicon entity matching: per-term str.find scan vs the Aho-Corasick matcher.
+
+Run from the App directory:
+    python benchmarks/bench_entity_matcher.py --sizes 100 1000 10000 50000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from medical_lexicon import EntityMatcher, load_lexicon  # noqa: E402
+
+
+def synthetic_lexicon(size, base_entries, seed=0):
+    """Real lexicon entries padded with random drug-like names up to `size` terms"""
+    rng = random.Random(seed)
+    entries = list(base_entries[:size])
+    while len(entries) < size:
+        name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 14)))
+        entries.append((name, "medication", name))
+    return entries
+
+
+def synthetic_report(entries, words=5000, seed=1):
+    """OCR-like text where roughly 1 word in 20 is a lexicon term"""
+    rng = random.Random(seed)
+    filler = ["patient", "mg", "daily", "result", "normal", "range", "reported", "value", "twice", "after"]
+    tokens = []
+    for _ in range(words):
+        if rng.random() < 0.05:
+            tokens.append(rng.choice(entries)[0])
+        else:
+            tokens.append(rng.choice(filler))
+        if rng.random() < 0.1:
+            tokens.append(f"{rng.uniform(0, 300):.1f}")
+    return " ".join(tokens)
+
+
+def naive_find_all(entries, text):
+    """Baseline: scan the lowered text once per term"""
+    lowered = text.lower()
+    found = 0
+    for term, _category, _canonical in entries:
+        start = lowered.find(term.lower())
+        while start != -1:
+            found += 1
+            start = lowered.find(term.lower(), start + 1)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--words", type=int, default=5000, help="words in the synthetic report")
+    args = parser.parse_args()
+
+    base_entries = load_lexicon()
+    print(f"{'terms':>7} {'build (s)':>10} {'matcher (ms)':>13} {'naive find (ms)':>16} {'matches':>8}")
+    for size in args.sizes:
+        entries = synthetic_lexicon(size, base_entries)
+        text = synthetic_report(entries, args.words)
+
+        start = time.perf_counter()
+        matcher = EntityMatcher(entries)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matches = matcher.find_all(text)
+        matcher_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        naive_find_all(entries, text)
+        naive_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{size:>7} {build_seconds:>10.3f} {matcher_ms:>13.1f} {naive_ms:>16.1f} {len(matches):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark the handwriting classifier: full-resolution features vs the thumbnail classifier.
+
+Run from the App directory:
+    python benchmarks/bench_handwriting_classifier.py --images test_images --dpi 300
+
+Every image in the folder is classified, plus every page of each PDF rendered
+at --dpi; the table reports per-page time for both versions and whether their
+decisions agree.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ocr  # noqa: E402
+
+
+def full_resolution_is_handwritten(image_np):
+    """The original classifier: Canny, dilate and erode over the whole page"""
+    gray = cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY) if len(image_np.shape) == 3 else image_np
+    edge_density = np.count_nonzero(cv2.Canny(gray, 50, 150)) / gray.size
+    kernel = np.ones((3, 3), np.uint8)
+    stroke = cv2.subtract(cv2.dilate(gray, kernel, iterations=1), cv2.erode(gray, kernel, iterations=1))
+    stroke_std = np.std(stroke[stroke > 0]) if np.count_nonzero(stroke) > 0 else 0
+    return edge_density > 0.05 and stroke_std > 15
+
+
+def thumbnail_is_handwritten(image_np):
+    """The current classifier, including the grayscale conversion it shares with preprocessing"""
+    return ocr.is_handwritten(image_np, ocr.page_features(ocr.to_gray(image_np)))
+
+
+def load_pages(folder, dpi):
+    """(name, BGR array) for each image in the folder and each page of each PDF"""
+    pages = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        ext = os.path.splitext(name)[1].lower()
+        if ext in ocr.SUPPORTED_IMAGE_EXTENSIONS:
+            pages.append((name, cv2.imread(path)))
+        elif ext == ".pdf":
+            with fitz.open(path) as doc:
+                for page_number, image_np in enumerate(ocr.iter_page_images(doc, dpi), start=1):
+                    pages.append((f"{name} p{page_number}", cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)))
+    return pages
+
+
+def time_call(fn, image_np, repeats):
+    """Best-of-N wall time in milliseconds and the function's result"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(image_np)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-resolution and thumbnail handwriting detection.")
+    parser.add_argument("--images", default="test_images", help="folder of images and PDFs")
+    parser.add_argument("--dpi", type=int, default=ocr.OCR_DPI, help="render resolution for PDF pages")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.images, args.dpi)
+    print(f"{'page':<20}{'size':>12}{'full ms':>10}{'thumb ms':>10}{'full':>7}{'thumb':>7}")
+    total_full = total_thumb = 0.0
+    agree = 0
+    for name, image_np in pages:
+        full_ms, full_decision = time_call(full_resolution_is_handwritten, image_np, args.repeats)
+        thumb_ms, thumb_decision = time_call(thumbnail_is_handwritten, image_np, args.repeats)
+        total_full += full_ms
+        total_thumb += thumb_ms
+        agree += full_decision == thumb_decision
+        size = f"{image_np.shape[1]}x{image_np.shape[0]}"
+        print(f"{name:<20}{size:>12}{full_ms:>10.1f}{thumb_ms:>10.1f}{str(full_decision):>7}{str(thumb_decision):>7}")
+
+    if pages:
+        print(f"\nMean per page: {total_full / len(pages):.1f} ms -> {total_thumb / len(pages):.1f} ms "
+              f"({total_full / max(total_thumb, 1e-9):.1f}x); decisions agree on {agree}/{len(pages)}")
+    return 0 if agree == len(pages) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
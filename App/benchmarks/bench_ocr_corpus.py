@@ -0,0 +1,270 @@
+"""OCR speed and accuracy over test_images plus synthetic pages with known text.
+
+Run from the App directory:
+    python benchmarks/bench_ocr_corpus.py --output bench_ocr.json
+    python benchmarks/bench_ocr_corpus.py --compare bench_ocr.json
+
+Every image in --images is OCR'd, as is every page of each PDF (rendered at
+OCR_DPI) and --synthetic generated pages. Per page it records the time spent
+in each stage, the mean word confidence and the character error rate (CER)
+against ground truth:
+  - images: an optional sidecar file next to the image, e.g. gg3.png.gt.txt
+  - PDF pages: the page's digital text layer, when it has one
+  - synthetic pages: the text they were drawn from
+Pages without ground truth are timed but get a CER of null.
+
+The JSON report has sorted keys and rounded values so runs can be diffed or
+compared with --compare; the tesseract settings in use are recorded too.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+# Optional fast edit distance: pip install rapidfuzz
+try:
+    from rapidfuzz.distance import Levenshtein
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ocr  # noqa: E402
+import ocr_engine  # noqa: E402
+from medical_lexicon import load_lexicon  # noqa: E402
+
+REPORT_VERSION = 1
+STAGES = ("load", "classify", "preprocess", "script", "ocr")
+GROUND_TRUTH_SUFFIX = ".gt.txt"
+MIN_GROUND_TRUTH_CHARS = 20   # Shorter PDF text layers are not used as ground truth
+
+# Synthetic pages: letter size at OCR_DPI with lines of lab values and medicines
+SYNTHETIC_PAGE_SIZE = (1700, 2200)
+SYNTHETIC_LINES = 30
+
+
+def normalize_text(text):
+    """Collapse whitespace so layout differences do not count as errors"""
+    return " ".join(text.split())
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings"""
+    if RAPIDFUZZ_AVAILABLE:
+        return Levenshtein.distance(a, b)
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def character_error_rate(hypothesis, reference):
+    """Edits needed to turn the OCR text into the reference, per reference character"""
+    reference = normalize_text(reference)
+    hypothesis = normalize_text(hypothesis)
+    if not reference:
+        return None
+    return edit_distance(hypothesis, reference) / len(reference)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil reports the peak working set instead
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if platform.system() == "Darwin" else peak / 1024
+
+
+def synthetic_pages(count, seed=0):
+    """(name, BGR page, text) for generated report pages drawn with OpenCV's Hershey font"""
+    rng = random.Random(seed)
+    lexicon = load_lexicon()
+    labs = [term for term, category, _ in lexicon if category == "lab"]
+    medications = [term for term, category, _ in lexicon if category == "medication"]
+    width, height = SYNTHETIC_PAGE_SIZE
+    pages = []
+    for index in range(count):
+        page = np.full((height, width, 3), 255, dtype=np.uint8)
+        lines = []
+        for line_number in range(SYNTHETIC_LINES):
+            if rng.random() < 0.6:
+                line = f"{rng.choice(labs)}: {rng.uniform(0.5, 300):.1f}"
+            else:
+                line = f"{rng.choice(medications)} {rng.choice([250, 500, 650, 1000])} mg {rng.choice(['OD', 'BD', 'TDS'])}"
+            y = 120 + line_number * 65
+            cv2.putText(page, line, (100, y), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2, cv2.LINE_AA)
+            lines.append(line)
+        pages.append((f"synthetic-{index + 1}", page, "\n".join(lines)))
+    return pages
+
+
+def corpus(image_dir, synthetic_count, dpi):
+    """Yield (name, kind, loader, ground truth or None); loaders return a BGR page"""
+    for name in sorted(os.listdir(image_dir)):
+        path = os.path.join(image_dir, name)
+        ext = os.path.splitext(name)[1].lower()
+        if ext in ocr.SUPPORTED_IMAGE_EXTENSIONS:
+            truth_path = path + GROUND_TRUTH_SUFFIX
+            truth = None
+            if os.path.exists(truth_path):
+                with open(truth_path, encoding="utf-8") as f:
+                    truth = f.read()
+            yield name, "image", lambda path=path: ocr.load_image(path), truth
+        elif ext == ".pdf":
+            with fitz.open(path) as doc:
+                for page_num in range(len(doc)):
+                    truth = doc.load_page(page_num).get_text()
+                    if len(truth.strip()) < MIN_GROUND_TRUTH_CHARS:
+                        truth = None
+
+                    def render(path=path, page_num=page_num):
+                        with fitz.open(path) as page_doc:
+                            image_np = next(ocr.iter_page_images(page_doc, dpi, [page_num]))
+                            return cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+                    yield f"{name} p{page_num + 1}", "pdf", render, truth
+    for name, page, truth in synthetic_pages(synthetic_count):
+        yield name, "synthetic", lambda page=page: page, truth
+
+
+def run_page(loader):
+    """Run each OCR stage once on a page, returning the image, the result and stage seconds"""
+    seconds = {}
+    start = time.perf_counter()
+    image_np = loader()
+    seconds["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gray = ocr.to_gray(image_np)
+    handwritten = ocr.is_handwritten(image_np, ocr.page_features(gray))
+    seconds["classify"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ocr.preprocess_image(image_np, gray)
+    seconds["preprocess"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lang = ocr.document_language(image_np)
+    seconds["script"] = time.perf_counter() - start
+
+    # Recognition plus low-confidence line re-reads (preprocessing is repeated inside)
+    start = time.perf_counter()
+    result = ocr.ocr_with_confidence(image_np, gray, handwritten, lang)
+    seconds["ocr"] = time.perf_counter() - start
+    return image_np, result, seconds
+
+
+def summarize(pages, elapsed):
+    cers = [page["cer"] for page in pages if page["cer"] is not None]
+    stage_ms = {}
+    for stage in STAGES:
+        values = np.array([page["stage_ms"][stage] for page in pages])
+        stage_ms[stage] = {"mean": round(float(values.mean()), 2), "p95": round(float(np.percentile(values, 95)), 2)}
+    return {
+        "pages": len(pages),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(pages) / elapsed, 3) if elapsed else 0.0,
+        "stage_ms": stage_ms,
+        "pages_with_ground_truth": len(cers),
+        "mean_cer": round(sum(cers) / len(cers), 4) if cers else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def summary_value(report, path):
+    value = report.get("summary", {})
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(report, baseline):
+    """Print summary metrics next to a baseline report"""
+    rows = [("pages/sec", ("pages_per_sec",)), ("mean CER", ("mean_cer",)), ("peak RSS MB", ("peak_rss_mb",))]
+    rows += [(f"{stage} ms (mean)", ("stage_ms", stage, "mean")) for stage in STAGES]
+    print(f"\n{'metric':<20}{'baseline':>12}{'current':>12}{'change':>10}")
+    for label, path in rows:
+        old, new = summary_value(baseline, path), summary_value(report, path)
+        if old is None or new is None:
+            print(f"{label:<20}{str(old):>12}{str(new):>12}")
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else ""
+        print(f"{label:<20}{old:>12.4g}{new:>12.4g}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR latency and accuracy over a fixed corpus.")
+    parser.add_argument("--images", default="test_images", help="folder of images and PDFs")
+    parser.add_argument("--synthetic", type=int, default=3, help="number of generated pages to add")
+    parser.add_argument("--dpi", type=int, default=ocr.OCR_DPI, help="render resolution for PDF pages")
+    parser.add_argument("--engine", default=ocr_engine.OCR_ENGINE, help="auto, tesserocr or pytesseract")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    ocr_engine.OCR_ENGINE = args.engine
+    pages = []
+    print(f"{'page':<22}{'kind':>10}{'hand':>6}{'conf':>7}{'cer':>8}{'ocr ms':>10}{'total ms':>10}")
+    start = time.perf_counter()
+    for name, kind, loader, truth in corpus(args.images, args.synthetic, args.dpi):
+        image_np, result, seconds = run_page(loader)
+        cer = character_error_rate(result["text"], truth) if truth is not None else None
+        page = {
+            "name": name,
+            "kind": kind,
+            "size": [int(image_np.shape[1]), int(image_np.shape[0])],
+            "handwritten": result["handwritten"],
+            "confidence": round(result["confidence"], 2) if result["confidence"] is not None else None,
+            "reocr_lines": result["reocr_lines"],
+            "cer": round(cer, 4) if cer is not None else None,
+            "stage_ms": {stage: round(seconds[stage] * 1000, 2) for stage in STAGES},
+        }
+        pages.append(page)
+        confidence = "-" if page["confidence"] is None else f"{page['confidence']:.0f}"
+        cer_text = "-" if page["cer"] is None else f"{page['cer']:.3f}"
+        print(f"{name:<22}{kind:>10}{str(page['handwritten']):>6}{confidence:>7}{cer_text:>8}"
+              f"{page['stage_ms']['ocr']:>10.0f}{sum(page['stage_ms'].values()):>10.0f}")
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "version": REPORT_VERSION,
+        "engine": ocr_engine.get_ocr_engine().name,
+        "ocr_config": ocr.ocr_config(),
+        "pages": pages,
+        "summary": summarize(pages, elapsed) if pages else {},
+    }
+    summary = report["summary"]
+    if pages:
+        print(f"\n{summary['pages']} pages in {summary['seconds']:.1f}s - {summary['pages_per_sec']:.2f} pages/sec, "
+              f"mean CER {summary['mean_cer']} over {summary['pages_with_ground_truth']} pages, "
+              f"peak RSS {summary['peak_rss_mb']:.0f} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+        print(f"Report written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare per-call OCR overhead of the pytesseract and in-process tesserocr engines.
+
+Run from the App directory:
+    python benchmarks/bench_ocr_engine.py --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ocr  # noqa: E402  (sets the tesseract binary path)
+from ocr_engine import PytesseractEngine, TesserocrEngine, TESSEROCR_AVAILABLE  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+
+def load_images(image_dir):
+    images = []
+    for name in sorted(os.listdir(image_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            images.append((name, ocr.load_image(os.path.join(image_dir, name))))
+    return images
+
+
+def time_engine(engine, images, config, repeat):
+    """Mean seconds per image_to_string call; the first call (engine start-up) is reported apart"""
+    start = time.perf_counter()
+    engine.image_to_string(images[0][1], config)
+    first_call = time.perf_counter() - start
+
+    timings = []
+    for _ in range(repeat):
+        for _name, image in images:
+            start = time.perf_counter()
+            engine.image_to_string(image, config)
+            timings.append(time.perf_counter() - start)
+    return first_call, sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", default="test_images", help="directory of test images")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the image set")
+    parser.add_argument("--config", default=ocr.PRINTED_TESSERACT_CONFIG, help="tesseract config string")
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        sys.exit(f"No images found in {args.images}")
+
+    engines = [PytesseractEngine()]
+    if TESSEROCR_AVAILABLE:
+        engines.append(TesserocrEngine())
+    else:
+        print("tesserocr not installed; only pytesseract is measured")
+
+    print(f"{len(images)} images x {args.repeat} passes, config '{args.config}'")
+    print(f"{'engine':<12} {'first call (s)':>15} {'mean per call (s)':>18}")
+    results = {}
+    for engine in engines:
+        first_call, mean_call = time_engine(engine, images, args.config, args.repeat)
+        results[engine.name] = mean_call
+        print(f"{engine.name:<12} {first_call:>15.3f} {mean_call:>18.3f}")
+
+    if len(results) == 2:
+        saved = results["pytesseract"] - results["tesserocr"]
+        print(f"Per-call overhead removed by tesserocr: {saved * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
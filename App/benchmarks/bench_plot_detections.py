@@ -0,0 +1,98 @@
+"""Benchmark detection rendering: the old matplotlib figure path vs OpenCV drawing in rcnnres.
+
+Run from the App directory:
+    python benchmarks/bench_plot_detections.py --size 1024 --boxes 1 10 100 --iterations 50
+
+The matplotlib path is the original plot_image_from_output + figure_to_array
+(one figure per call, never closed). For each box count the table shows the
+mean time per call, the Python heap still held after all iterations
+(tracemalloc) and how many figures were left open.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.patches as patches  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rcnnres  # noqa: E402
+
+
+def matplotlib_render(img, annotation):
+    """The original rendering: a matplotlib figure rasterized through the Agg renderer"""
+    img = img.cpu().detach().permute(1, 2, 0).numpy()
+    fig, ax = plt.subplots(1)
+    ax.imshow(img)
+    ax.axis('off')
+    if annotation and "scores" in annotation and len(annotation["scores"]) > 0:
+        max_score_idx = torch.argmax(annotation["scores"][0])
+        xmin, ymin, xmax, ymax = annotation["boxes"][max_score_idx].detach().cpu().numpy()
+        class_name = rcnnres.classes[annotation["labels"][max_score_idx]]
+        rect = patches.Rectangle((xmin, ymin), (xmax - xmin), (ymax - ymin), linewidth=2, edgecolor='orange', facecolor='none')
+        ax.add_patch(rect)
+        ax.text(xmin, ymin - 10, class_name, fontsize=12, color='orange', fontweight='bold')
+    fig.canvas.draw()
+    return np.array(fig.canvas.renderer._renderer)
+
+
+def opencv_render(img, annotation):
+    return rcnnres.plot_image_from_output(img, annotation)[0]
+
+
+def synthetic_detections(size, count, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    corners = torch.rand(count, 2, generator=generator) * size * 0.8
+    sizes = torch.rand(count, 2, generator=generator) * size * 0.2 + 10
+    scores, _ = torch.rand(count, generator=generator).sort(descending=True)
+    return {
+        "boxes": torch.cat([corners, corners + sizes], dim=1),
+        "labels": torch.randint(0, rcnnres.num_classes, (count,), generator=generator),
+        "scores": scores,
+    }
+
+
+def measure(render, img, annotation, iterations):
+    """Mean ms per call and Python heap MB still allocated after the run"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render(img, annotation)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / iterations * 1000, retained / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare matplotlib and OpenCV detection rendering.")
+    parser.add_argument("--size", type=int, default=1024, help="square image size in pixels")
+    parser.add_argument("--boxes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    img = torch.rand(3, args.size, args.size)
+    print(f"{args.size}x{args.size} image, {args.iterations} calls per row")
+    print(f"{'boxes':>6}{'renderer':>12}{'ms/call':>10}{'retained MB':>13}{'open figs':>11}")
+    for count in args.boxes:
+        annotation = synthetic_detections(args.size, count)
+        for name, render in (("matplotlib", matplotlib_render), ("opencv", opencv_render)):
+            figures_before = len(plt.get_fignums())
+            ms, retained_mb = measure(render, img, annotation, args.iterations)
+            open_figures = len(plt.get_fignums()) - figures_before
+            print(f"{count:>6}{name:>12}{ms:>10.1f}{retained_mb:>13.1f}{open_figures:>11}")
+        plt.close("all")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark detection post-processing: the per-score Python loop vs rcnnres.filter_prediction.
+
+Run from the App directory:
+    python benchmarks/bench_prediction_filter.py --counts 100 1000 10000 50000 --batch 8
+
+Predictions are synthetic (random boxes, labels and scores shaped like
+torchvision detector output), so no model weights are needed.
+"""
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rcnnres  # noqa: E402
+
+
+def synthetic_predictions(batch, count, seed=0):
+    """One prediction dict per image with `count` detections"""
+    generator = torch.Generator().manual_seed(seed)
+    preds = []
+    for _ in range(batch):
+        corners = torch.rand(count, 2, generator=generator) * 500
+        sizes = torch.rand(count, 2, generator=generator) * 100 + 1
+        preds.append({
+            "boxes": torch.cat([corners, corners + sizes], dim=1),
+            "labels": torch.randint(0, rcnnres.num_classes, (count,), generator=generator),
+            "scores": torch.rand(count, generator=generator),
+        })
+    return preds
+
+
+def loop_filter(preds, threshold):
+    """The original post-processing: collect indices score by score, then index each tensor"""
+    filtered = []
+    for pred in preds:
+        idx_list = []
+        for idx, score in enumerate(pred['scores']):
+            if score > threshold:
+                idx_list.append(idx)
+        filtered.append({key: pred[key][idx_list] for key in ('boxes', 'labels', 'scores')})
+    return filtered
+
+
+def mask_filter(preds, threshold):
+    return [rcnnres.filter_prediction(pred, threshold) for pred in preds]
+
+
+def best_time(fn, preds, threshold, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(preds, threshold)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare loop and boolean-mask detection filtering.")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 10000, 50000], help="detections per image")
+    parser.add_argument("--batch", type=int, default=4, help="images per batch")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"batch of {args.batch} images, threshold {args.threshold}")
+    print(f"{'detections':>12}{'loop ms':>12}{'mask ms':>12}{'speed-up':>10}")
+    for count in args.counts:
+        preds = synthetic_predictions(args.batch, count)
+        loop_ms, loop_result = best_time(loop_filter, preds, args.threshold, args.repeats)
+        mask_ms, mask_result = best_time(mask_filter, preds, args.threshold, args.repeats)
+        for expected, actual in zip(loop_result, mask_result):
+            assert all(torch.equal(expected[key], actual[key]) for key in expected), "filters disagree"
+        print(f"{count:>12}{loop_ms:>12.2f}{mask_ms:>12.3f}{loop_ms / max(mask_ms, 1e-9):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Latency/accuracy report for the X-ray detectors on each inference backend.
+
+Run from the App directory (needs the weights and, for ONNX, onnx + onnxruntime):
+    python benchmarks/bench_xray_backends.py --images /data/xrays --output backends.json
+
+Every model runs on PyTorch, ONNX Runtime and ONNX Runtime int8. The PyTorch
+output is the reference: for the other backends the report gives the share
+of images whose top detection has the same class and overlaps the reference
+box (IoU >= 0.5), and the mean score difference of that detection. Without
+--images, random images only measure latency.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rcnnres  # noqa: E402
+from model_registry import XRAY_MODEL_NAMES, build_xray_registry, registry_name  # noqa: E402
+from onnx_backend import PYTORCH_BACKEND, available_backends  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+MIN_IOU = 0.5
+
+
+def load_images(image_dir, synthetic, size=640):
+    """RGB PIL images from a folder, or random ones"""
+    if image_dir:
+        return [Image.open(os.path.join(image_dir, name)).convert("RGB")
+                for name in sorted(os.listdir(image_dir)) if name.lower().endswith(IMAGE_EXTENSIONS)]
+    rng = np.random.default_rng(0)
+    return [Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8)) for _ in range(synthetic)]
+
+
+def predict(model_name, model, image):
+    """Raw detections for one image as a boxes/labels/scores dict"""
+    if model_name == "YoloV8":
+        boxes = model.predict(image, conf=0.01, verbose=False)[0].boxes
+        return {"boxes": boxes.xyxy.cpu(), "labels": boxes.cls.cpu().long(), "scores": boxes.conf.cpu()}
+    tensor = torch.from_numpy(np.asarray(image)).permute(2, 0, 1).float() / 255
+    return rcnnres.predict_raw(model, [tensor])[0]
+
+
+def box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def top_detection(pred):
+    if len(pred["scores"]) == 0:
+        return None
+    index = int(pred["scores"].argmax())
+    return pred["boxes"][index].tolist(), int(pred["labels"][index]), float(pred["scores"][index])
+
+
+def agreement(reference, candidate):
+    """(top detections match, score difference) for one image; None if the reference found nothing"""
+    expected, actual = top_detection(reference), top_detection(candidate)
+    if expected is None:
+        return None
+    if actual is None:
+        return False, expected[2]
+    matches = expected[1] == actual[1] and box_iou(expected[0], actual[0]) >= MIN_IOU
+    return matches, abs(expected[2] - actual[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch, ONNX Runtime and int8 X-ray inference.")
+    parser.add_argument("--images", help="folder of X-ray images (random images if omitted)")
+    parser.add_argument("--synthetic", type=int, default=4, help="random images when --images is not given")
+    parser.add_argument("--models", nargs="+", default=XRAY_MODEL_NAMES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.synthetic)
+    registry = build_xray_registry(budget_mb=float("inf"))
+    backends = available_backends()
+    if backends == [PYTORCH_BACKEND]:
+        print("onnxruntime is not installed; only PyTorch is measured")
+
+    rows = []
+    print(f"{len(images)} images, best of {args.repeats}")
+    print(f"{'model':<22}{'backend':<20}{'load s':>8}{'ms/img':>9}{'top-1 match':>13}{'score diff':>12}")
+    for model_name in args.models:
+        references = None
+        for backend in backends:
+            start = time.perf_counter()
+            model = registry.get(registry_name(model_name, backend))
+            load_seconds = time.perf_counter() - start
+
+            best = float("inf")
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                preds = [predict(model_name, model, image) for image in images]
+                best = min(best, time.perf_counter() - start)
+            if backend == PYTORCH_BACKEND:
+                references = preds
+
+            row = {
+                "model": model_name,
+                "backend": backend,
+                "load_seconds": round(load_seconds, 2),
+                "ms_per_image": round(best / len(images) * 1000, 1),
+                "top1_match": None,
+                "mean_score_diff": None,
+            }
+            if references is not None and backend != PYTORCH_BACKEND and args.images:
+                results = [r for r in (agreement(ref, pred) for ref, pred in zip(references, preds)) if r is not None]
+                if results:
+                    row["top1_match"] = round(sum(match for match, _ in results) / len(results), 3)
+                    row["mean_score_diff"] = round(sum(diff for _, diff in results) / len(results), 4)
+            rows.append(row)
+            registry.unload(registry_name(model_name, backend))
+
+            match = "-" if row["top1_match"] is None else f"{row['top1_match']:.0%}"
+            diff = "-" if row["mean_score_diff"] is None else f"{row['mean_score_diff']:.4f}"
+            print(f"{model_name:<22}{backend:<20}{row['load_seconds']:>8.1f}{row['ms_per_image']:>9.1f}{match:>13}{diff:>12}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"images": len(images), "results": rows}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
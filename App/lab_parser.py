@@ -0,0 +1,191 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from medical_lexicon import get_entity_matcher
+
+DEFAULT_RANGES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "lab_reference_ranges.csv")
+
+NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+
+# Value, optional printed reference range and optional unit following a lab name, e.g.
+# "Hb : 11.2 g/dL", "TLC (Blood) - 7,500 /cumm", "Total Leucocyte Count 5000 4000 - 10000 /cumm"
+VALUE_PATTERN = re.compile(
+    r"[\s:=\-–]*(?:\([^)\n]{0,20}\)[\s:=\-–]*)?"
+    rf"(?P<value>{NUMBER})"
+    rf"(?:[ \t]+(?P<range_low>{NUMBER})[ \t]*[-–][ \t]*(?P<range_high>{NUMBER}))?"
+    r"[ \t]*(?P<unit>(?:x\s*)?10\^?\d+\s*/\s*[a-zA-Zµμ]+|[a-zA-Zµμ%/][a-zA-Z0-9µμ%/^.]*)?"
+)
+MAX_VALUE_DISTANCE = 25  # Characters allowed between the lab name and its value
+MAX_UNITLESS_RATIO = 10  # A value without a unit further than this factor outside the reference range is in other units
+
+# Spellings seen in Indian and international reports -> canonical unit
+UNIT_ALIASES = {
+    "g/dl": "g/dL", "gm/dl": "g/dL", "gm%": "g/dL", "g/l": "g/L",
+    "mg/dl": "mg/dL", "mg/l": "mg/L",
+    "mmol/l": "mmol/L", "meq/l": "mmol/L", "umol/l": "umol/L",
+    "miu/l": "mIU/L", "uiu/ml": "mIU/L", "miu/ml": "mIU/mL",
+    "u/l": "U/L", "iu/l": "U/L",
+    "ng/ml": "ng/mL", "pg/ml": "pg/mL", "ng/dl": "ng/dL", "ug/dl": "ug/dL", "mcg/dl": "ug/dL",
+    "fl": "fL", "pg": "pg", "%": "%",
+    "mm/hr": "mm/hr", "mm/h": "mm/hr", "mm/1sthr": "mm/hr",
+    "/cumm": "/cumm", "cells/cumm": "/cumm", "/ul": "/cumm", "/mm3": "/cumm",
+    "lakhs/cumm": "lakhs/cumm", "lakh/cumm": "lakhs/cumm",
+    "million/cumm": "10^6/uL", "mill/cumm": "10^6/uL", "millions/cumm": "10^6/uL",
+    "10^3/ul": "10^3/uL", "x10^3/ul": "10^3/uL", "k/ul": "10^3/uL", "thou/ul": "10^3/uL", "10^9/l": "10^3/uL",
+    "10^6/ul": "10^6/uL", "x10^6/ul": "10^6/uL", "10^12/l": "10^6/uL",
+}
+
+# (from unit, to unit, test or "*" for any test) -> multiplication factor
+UNIT_CONVERSIONS = [
+    ("g/L", "g/dL", "*", 0.1),
+    ("/cumm", "10^3/uL", "*", 0.001),
+    ("lakhs/cumm", "10^3/uL", "*", 100.0),
+    ("mmol/L", "mg/dL", "glucose", 18.016),
+    ("mmol/L", "mg/dL", "post-prandial glucose", 18.016),
+    ("mmol/L", "mg/dL", "random glucose", 18.016),
+    ("mmol/L", "mg/dL", "total cholesterol", 38.67),
+    ("mmol/L", "mg/dL", "hdl", 38.67),
+    ("mmol/L", "mg/dL", "ldl", 38.67),
+    ("mmol/L", "mg/dL", "triglycerides", 88.57),
+    ("mmol/L", "mg/dL", "bun", 2.8),
+    ("mmol/L", "mg/dL", "calcium", 4.008),
+    ("umol/L", "mg/dL", "creatinine", 1 / 88.4),
+    ("umol/L", "mg/dL", "total bilirubin", 1 / 17.1),
+    ("umol/L", "mg/dL", "direct bilirubin", 1 / 17.1),
+    ("umol/L", "mg/dL", "uric acid", 1 / 59.48),
+]
+
+FINDING_COLUMNS = ["test", "term", "value", "unit", "range_low", "range_high", "start"]
+
+
+def normalize_unit(unit):
+    """Map a unit spelling to its canonical form; unknown units are returned unchanged"""
+    if not unit:
+        return ""
+    key = unit.strip().rstrip(".").replace("µ", "u").replace("μ", "u").replace(" ", "").lower()
+    return UNIT_ALIASES.get(key, unit.strip())
+
+
+def load_reference_ranges(path=DEFAULT_RANGES_PATH):
+    """Reference range table with columns test, unit, low, high (blank bound = open-ended)"""
+    ranges = pd.read_csv(path, dtype={"test": str, "unit": str})
+    ranges["unit"] = ranges["unit"].fillna("")
+    return ranges.rename(columns={"unit": "ref_unit"})
+
+
+def to_number(text):
+    return float(text.replace(",", "")) if text else np.nan
+
+
+def parse_lab_values(text):
+    """Extract (test, value, unit, printed range) findings from OCR text as a DataFrame.
+
+    Lab names come from the medical lexicon matcher (so aliases like SGPT or
+    TLC map to their canonical test); the value must follow the name closely.
+    A reference range printed between the value and the unit is kept as
+    range_low/range_high.
+    """
+    rows = []
+    covered_until = 0
+    for match in get_entity_matcher().find_all(text):
+        if match["category"] != "lab" or match["start"] < covered_until:
+            continue
+        covered_until = match["end"]
+        value_match = VALUE_PATTERN.match(text, match["end"], match["end"] + MAX_VALUE_DISTANCE + 40)
+        if value_match is None or value_match.start("value") - match["end"] > MAX_VALUE_DISTANCE:
+            continue
+        rows.append({
+            "test": match["canonical"],
+            "term": text[match["start"]:match["end"]],
+            "value": to_number(value_match.group("value")),
+            "unit": normalize_unit(value_match.group("unit")),
+            "range_low": to_number(value_match.group("range_low")),
+            "range_high": to_number(value_match.group("range_high")),
+            "start": match["start"],
+        })
+    return pd.DataFrame(rows, columns=FINDING_COLUMNS)
+
+
+def flag_lab_values(findings, ranges=None):
+    """Convert findings to reference units and flag them LOW/HIGH/NORMAL in one vectorized pass.
+
+    A range printed on the report is in the report's own units and takes
+    precedence over the reference table. Findings without a reference range,
+    with an unconvertible unit, or without a unit and far outside the
+    reference range (likely printed in other units) are flagged UNKNOWN.
+
+    >>> findings = parse_lab_values("Total Leucocyte Count 5000 4000 - 10000 /cumm\\nPlatelet Count 300000")
+    >>> print(findings_to_text(flag_lab_values(findings)))
+    wbc: 5000 /cumm (NORMAL, ref 4000-10000)
+    platelets: 300000
+    """
+    if ranges is None:
+        ranges = load_reference_ranges()
+    flagged = findings.merge(ranges, on="test", how="left")
+
+    conversions = pd.DataFrame(UNIT_CONVERSIONS, columns=["unit", "ref_unit", "conv_test", "factor"])
+    specific = conversions[conversions["conv_test"] != "*"].rename(columns={"conv_test": "test"})
+    generic = conversions[conversions["conv_test"] == "*"].drop(columns="conv_test")
+    flagged = flagged.merge(specific, on=["unit", "ref_unit", "test"], how="left")
+    flagged = flagged.merge(generic, on=["unit", "ref_unit"], how="left", suffixes=("", "_generic"))
+
+    # Same unit needs no conversion; no unit printed is taken as reference units only when plausible
+    raw = flagged["value"].to_numpy(dtype=float)
+    low = flagged["low"].to_numpy(dtype=float)
+    high = flagged["high"].to_numpy(dtype=float)
+    unitless = (flagged["unit"] == "").to_numpy()
+    with np.errstate(invalid="ignore"):
+        plausible = ~((raw < low / MAX_UNITLESS_RATIO) | (raw > high * MAX_UNITLESS_RATIO))
+    same_unit = (flagged["unit"] == flagged["ref_unit"]).to_numpy() | (unitless & plausible)
+    factor = np.where(same_unit, 1.0, flagged["factor"].fillna(flagged["factor_generic"]))
+    flagged["value_norm"] = raw * factor.astype(float)
+    flagged = flagged.drop(columns=["factor", "factor_generic"])
+
+    # Ranges printed on the report replace the reference table for that row
+    printed = flagged["range_low"].notna().to_numpy()
+    flagged["value_norm"] = np.where(printed, raw, flagged["value_norm"])
+    flagged["low"] = np.where(printed, flagged["range_low"], low)
+    flagged["high"] = np.where(printed, flagged["range_high"], high)
+    flagged["ref_unit"] = flagged["ref_unit"].where(~printed, flagged["unit"])
+
+    value = flagged["value_norm"].to_numpy()
+    low = flagged["low"].to_numpy(dtype=float)
+    high = flagged["high"].to_numpy(dtype=float)
+    has_range = flagged["ref_unit"].notna().to_numpy() & ~np.isnan(value)
+    with np.errstate(invalid="ignore"):
+        is_low = has_range & (value < low)
+        is_high = has_range & (value > high)
+    flagged["flag"] = np.select([~has_range, is_low, is_high], ["UNKNOWN", "LOW", "HIGH"], default="NORMAL")
+    return flagged
+
+
+def findings_table(flagged):
+    """Display table: values in the units of the range they were flagged against
+
+    UNKNOWN findings keep the value and unit as printed and show no range.
+    """
+    known = flagged["flag"] != "UNKNOWN"
+    return pd.DataFrame({
+        "test": flagged["test"],
+        "value": flagged["value_norm"].where(known, flagged["value"]).round(2),
+        "unit": flagged["ref_unit"].where(known, flagged["unit"]),
+        "low": flagged["low"].where(known),
+        "high": flagged["high"].where(known),
+        "flag": flagged["flag"],
+    })
+
+
+def findings_to_text(flagged):
+    """Compact one-line-per-test summary suitable for an LLM prompt"""
+    lines = []
+    for row in flagged.itertuples(index=False):
+        if row.flag == "UNKNOWN":
+            lines.append(f"{row.test}: {row.value:g} {row.unit}".rstrip())
+            continue
+        low = "" if pd.isna(row.low) else f"{row.low:g}"
+        high = "" if pd.isna(row.high) else f"{row.high:g}"
+        lines.append(f"{row.test}: {round(row.value_norm, 2):g} {row.ref_unit} ({row.flag}, ref {low}-{high})".replace("  ", " "))
+    return "\n".join(lines)
@@ -1,4 +1,5 @@
 import requests
+import json
 import os
 import subprocess
 import time
@@ -195,6 +196,44 @@ def ask_llm(prompt):
     except Exception as e:
         return f"Unexpected error: {e}"
 
+def ask_llm_stream(prompt):
+    """Sends a prompt to the selected LLM model and yields the response as it is generated."""
+    # Ensure Ollama is ready
+    if not ensure_ollama_ready():
+        yield "Error: Could not establish Ollama connection"
+        return
+
+    model = get_model_name()
+
+    # Pull model if needed
+    if not pull_model_if_needed(model):
+        yield f"Error: Could not ensure model {model} is available"
+        return
+
+    try:
+        with requests.post(f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/generate",
+                           json={
+                               "model": model,
+                               "prompt": prompt,
+                               "stream": True
+                           }, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            # Ollama streams one JSON object per line
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    break
+    except requests.exceptions.Timeout:
+        yield "Error: Request timed out"
+    except requests.exceptions.RequestException as e:
+        yield f"Error communicating with LLM: {e}"
+    except Exception as e:
+        yield f"Unexpected error: {e}"
+
 def test_llm_connection():
     """Test the LLM connection with a simple prompt."""
     test_response = ask_llm("Hello! Please respond with 'Connection successful!'")
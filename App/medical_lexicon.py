@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import deque
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "medical_lexicon.tsv")
+
+
+def load_lexicon(path=DEFAULT_LEXICON_PATH):
+    """Read a lexicon file of `term<TAB>category<TAB>canonical` lines.
+
+    The canonical column is optional (defaults to the term); blank lines and
+    lines starting with '#' are ignored.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = [part.strip() for part in line.split("\t")]
+            term, category = parts[0], parts[1]
+            canonical = parts[2] if len(parts) > 2 and parts[2] else term
+            entries.append((term, category, canonical))
+    return entries
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class EntityMatcher():
+    """Aho-Corasick automaton over a medical lexicon.
+
+    Built once from (term, category, canonical) entries; find_all() then
+    reports every occurrence of every term in a single pass over the text,
+    keeping only matches that start and end on word boundaries.
+    """
+
+    def __init__(self, entries) -> None:
+        # State 0 is the root; each state has goto edges, a failure link and outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+
+        for term, category, canonical in entries:
+            pattern = term.lower()
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append((len(pattern), term, category, canonical))
+
+        self._build_failure_links()
+        self.size = len(entries)
+
+    def _build_failure_links(self):
+        """Breadth-first pass linking each state to its longest proper suffix state"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                # Inherit matches that end at the suffix state
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def find_all(self, text):
+        """Return every whole-word lexicon match as dicts with term, category, canonical, start, end"""
+        lowered = text.lower()
+        matches = []
+        state = 0
+        for index, ch in enumerate(lowered):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            if not self._outputs[state]:
+                continue
+            end = index + 1
+            after_ok = end == len(lowered) or not _is_word_char(lowered[end])
+            if not after_ok:
+                continue
+            for length, term, category, canonical in self._outputs[state]:
+                start = end - length
+                if start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                matches.append({
+                    "term": term,
+                    "category": category,
+                    "canonical": canonical,
+                    "start": start,
+                    "end": end,
+                })
+        matches.sort(key=lambda match: (match["start"], -match["end"]))
+        return matches
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_entity_matcher(path=DEFAULT_LEXICON_PATH):
+    """Return the process-wide matcher for the default lexicon, compiling it on first use"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = EntityMatcher(load_lexicon(path))
+    return _matcher
@@ -0,0 +1,269 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+import onnx_backend
+from onnx_backend import PYTORCH_BACKEND, ONNX_INT8_BACKEND
+
+MODEL_MEMORY_BUDGET_MB = 1024      # Loaded models beyond this are unloaded, least recently used first
+WARMUP_MODELS_AT_STARTUP = False   # Load and warm up every X-ray model when the app starts
+WARMUP_IMAGE_SIZE = 640
+YOLO_IMAGE_SIZE = 640              # Ultralytics' default inference size, used to size YOLO batches
+PREDICTION_CACHE_SIZE = 32         # Raw predictions kept for threshold-only reruns
+
+# Batched inference: batches are sized from the currently free memory
+BATCH_MEMORY_FRACTION = 0.25         # Share of the currently free RAM one batch may use
+BYTES_PER_INPUT_PIXEL = 3 * 4 * 60   # fp32 RGB input times a rough activation multiplier for the detectors
+MAX_BATCH_SIZE = 16
+
+YOLO_WEIGHTS_PATH = os.path.join("weights", "yolov8.pt")
+RESNET_WEIGHTS_PATH = os.path.join("weights", "Resnet.pt")
+VGG_WEIGHTS_PATH = os.path.join("weights", "model_vgg.pt")
+XRAY_MODEL_NAMES = ["YoloV8", "FastRCNN with ResNet", "VGG16"]
+
+_hash_cache = {}
+_hash_cache_lock = threading.Lock()
+
+
+def weights_hash(path):
+    """SHA-256 of a weights file, recomputed only when its size or modification time changes"""
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _hash_cache_lock:
+        cached = _hash_cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _hash_cache_lock:
+        _hash_cache[path] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def model_size_mb(model, weights_path):
+    """Memory held by a model's parameters and buffers (its own size_mb or the weights file size otherwise)"""
+    if getattr(model, "size_mb", None) is not None:
+        return model.size_mb
+    if isinstance(model, torch.nn.Module):
+        tensors = list(model.parameters()) + list(model.buffers())
+        if tensors:
+            return sum(t.numel() * t.element_size() for t in tensors) / 2 ** 20
+    return os.path.getsize(weights_path) / 2 ** 20
+
+
+def batch_size_for(image_size, available_bytes=None):
+    """How many image_size x image_size images fit in one batch given the free memory"""
+    if available_bytes is None:
+        try:
+            import psutil
+            available_bytes = psutil.virtual_memory().available
+        except ImportError:
+            return 1
+    per_image = image_size * image_size * BYTES_PER_INPUT_PIXEL
+    return int(max(1, min(MAX_BATCH_SIZE, available_bytes * BATCH_MEMORY_FRACTION // per_image)))
+
+
+class ModelRegistry():
+    """Process-wide cache of inference models.
+
+    Models are registered by name with a weights path and a loader, loaded
+    on first use and optionally warmed up. Loaders return models ready for
+    inference (torchvision detectors already in eval mode; ultralytics YOLO
+    manages its own mode and must not be switched with eval()). Loaded
+    models are keyed by (name, weights hash), so replacing a weights file
+    loads the new model on next use. When the loaded models exceed the
+    memory budget the least recently used ones are unloaded.
+    """
+
+    def __init__(self, budget_mb=MODEL_MEMORY_BUDGET_MB) -> None:
+        self.budget_mb = budget_mb
+        self._specs = {}
+        self._loaded = OrderedDict()   # (name, weights hash) -> {"model", "size_mb", "load_seconds", "hits"}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def register(self, name, weights_path, loader, warmup=None):
+        """Add a model: loader(weights_path) returns it ready for inference, warmup(model) runs one dummy inference"""
+        with self._lock:
+            self._specs[name] = {"weights_path": weights_path, "loader": loader, "warmup": warmup}
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def names(self):
+        return list(self._specs)
+
+    def get(self, name):
+        """Return the loaded model for `name`, loading it if needed"""
+        spec = self._specs[name]
+        key = (name, weights_hash(spec["weights_path"]))
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["model"]
+
+        # One load per model name at a time; other names can load concurrently
+        with self._load_locks[name]:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry["model"]
+
+            start = time.perf_counter()
+            model = spec["loader"](spec["weights_path"])
+            if spec["warmup"] is not None:
+                spec["warmup"](model)
+            load_seconds = time.perf_counter() - start
+            size_mb = model_size_mb(model, spec["weights_path"])
+            print(f"Loaded {name} ({size_mb:.0f} MB) in {load_seconds:.2f}s")
+
+            with self._lock:
+                # Drop models loaded from older weights of the same name
+                for old_key in [k for k in self._loaded if k[0] == name]:
+                    del self._loaded[old_key]
+                self._loaded[key] = {"model": model, "size_mb": size_mb, "load_seconds": load_seconds, "hits": 0}
+                self._enforce_budget(keep=key)
+            return model
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._loaded.get(key)
+            if entry is not None:
+                entry["hits"] += 1
+                self._loaded.move_to_end(key)
+            return entry
+
+    def _enforce_budget(self, keep):
+        """Unload least recently used models until the total fits the budget (caller holds the lock)"""
+        total = sum(entry["size_mb"] for entry in self._loaded.values())
+        for key in list(self._loaded):
+            if total <= self.budget_mb:
+                break
+            if key == keep:
+                continue
+            total -= self._loaded.pop(key)["size_mb"]
+            print(f"Unloaded {key[0]} to stay within the {self.budget_mb} MB model budget")
+
+    def unload(self, name=None):
+        """Unload one model, or all of them"""
+        with self._lock:
+            for key in [k for k in self._loaded if name is None or k[0] == name]:
+                del self._loaded[key]
+
+    def warmup(self, names=None):
+        """Load (and warm up) the given models now instead of on first use"""
+        for name in names or self.names():
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Warm-up of {name} failed: {e}")
+
+    def stats(self):
+        """Loaded models with their size, load time and cache hits"""
+        with self._lock:
+            return [
+                {"name": name, "weights_hash": digest[:12], "size_mb": round(entry["size_mb"], 1),
+                 "load_seconds": round(entry["load_seconds"], 2), "hits": entry["hits"]}
+                for (name, digest), entry in self._loaded.items()
+            ]
+
+
+class PredictionCache():
+    """Small LRU of raw, unthresholded predictions keyed by (image hash, model name, backend, path)
+
+    Changing the confidence threshold only re-filters a cached prediction
+    instead of running the detector again.
+    """
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, prediction):
+        with self._lock:
+            self._entries[key] = prediction
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def load_yolo(weights_path):
+    from ultralytics import YOLO
+    return YOLO(weights_path)
+
+
+def warmup_yolo(model):
+    model.predict(np.zeros((WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE, 3), dtype=np.uint8), verbose=False)
+
+
+def predict_yolo_batch(model, images, conf, batch_size=None, **kwargs):
+    """Ultralytics results for many images, one per image; each batch is letterboxed by ultralytics itself"""
+    batch_size = batch_size or batch_size_for(YOLO_IMAGE_SIZE)
+    results = []
+    for start in range(0, len(images), batch_size):
+        results.extend(model.predict(images[start:start + batch_size], conf=conf, verbose=False, **kwargs))
+    return results
+
+
+def load_resnet(weights_path):
+    import rcnnres
+    return rcnnres.get_model(weights_path).eval()
+
+
+def load_vgg(weights_path):
+    import vgg
+    return vgg.get_vgg_model(weights_path).eval()
+
+
+def warmup_detector(model):
+    with torch.inference_mode():
+        model([torch.zeros(3, WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE)])
+
+
+def registry_name(model_name, backend=PYTORCH_BACKEND):
+    """Registry entry for a Sidebar model on a given inference backend"""
+    return model_name if backend == PYTORCH_BACKEND else f"{model_name} [{backend}]"
+
+
+def onnx_loader(model_name, build, quantize):
+    def load(weights_path):
+        digest = weights_hash(weights_path)
+        if build is None:
+            return onnx_backend.load_yolo_onnx(weights_path, model_name, digest, quantize)
+        return onnx_backend.load_detector_onnx(weights_path, model_name, digest, build, quantize)
+    return load
+
+
+def build_xray_registry(budget_mb=MODEL_MEMORY_BUDGET_MB):
+    """Registry of the X-ray fracture detectors, named as in the Sidebar model list
+
+    Every model is registered once per available backend (see registry_name).
+    """
+    registry = ModelRegistry(budget_mb)
+    registry.register("YoloV8", YOLO_WEIGHTS_PATH, load_yolo, warmup_yolo)
+    registry.register("FastRCNN with ResNet", RESNET_WEIGHTS_PATH, load_resnet, warmup_detector)
+    registry.register("VGG16", VGG_WEIGHTS_PATH, load_vgg, warmup_detector)
+
+    for backend in onnx_backend.available_backends():
+        if backend == PYTORCH_BACKEND:
+            continue
+        quantize = backend == ONNX_INT8_BACKEND
+        registry.register(registry_name("YoloV8", backend), YOLO_WEIGHTS_PATH,
+                          onnx_loader("YoloV8", None, quantize), warmup_yolo)
+        registry.register(registry_name("FastRCNN with ResNet", backend), RESNET_WEIGHTS_PATH,
+                          onnx_loader("FastRCNN with ResNet", load_resnet, quantize), warmup_detector)
+        registry.register(registry_name("VGG16", backend), VGG_WEIGHTS_PATH,
+                          onnx_loader("VGG16", load_vgg, quantize), warmup_detector)
+    return registry
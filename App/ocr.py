@@ -2,13 +2,23 @@ import os
 import cv2
 import numpy as np
 import pytesseract
-import pdf2image
 import docx2txt
-import tempfile
+from io import BytesIO
 from PIL import Image
 import fitz  # PyMuPDF for PDF processing
 import torch
+import threading
+import time
+import hashlib
+import multiprocessing
+import sqlite3
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
+from ocr_cache import OCRCache, make_cache_key
+from ocr_engine import get_ocr_engine, parse_tesseract_config
+from medical_lexicon import get_entity_matcher
 
 # Set Tesseract path if not in PATH - uncomment and set your path if needed
 # pytesseract.pytesseract.tesseract_cmd = r'/usr/bin/tesseract'
@@ -16,57 +26,127 @@ from pathlib import Path
 
 pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'  # or your actual tesseract path
 
-# Download YOLOv5 for handwriting detection
-def get_yolo_model():
-    """Load YOLOv5 model for handwriting detection"""
+# Tesseract settings for handwritten (preprocessed) and printed text
+HANDWRITTEN_TESSERACT_CONFIG = '--psm 6 --oem 1 -l eng'
+PRINTED_TESSERACT_CONFIG = '--psm 3 --oem 1 -l eng'
+
+# YOLOv5 handwriting detector settings
+YOLO_HUB_REPO = 'ultralytics/yolov5'
+YOLO_WEIGHTS_PATH = 'yolov5s.pt'
+WARMUP_YOLO_AT_STARTUP = False  # Load the detector in the background when the app starts
+
+# Process-wide model cache: the hub repo is imported and the model built only once
+_yolo_model = None
+_yolo_lock = threading.Lock()
+_yolo_warmup_thread = None
+
+# Most recent load / inference durations in seconds, reported separately
+yolo_timings = {"load_seconds": None, "inference_seconds": None}
+
+def _local_yolo_repo():
+    """Return the torch hub checkout of YOLOv5 if it was downloaded before"""
+    repo_dir = os.path.join(torch.hub.get_dir(), 'ultralytics_yolov5_master')
+    return repo_dir if os.path.isdir(repo_dir) else None
+
+def _load_yolo_model():
+    """Build the YOLOv5 model, preferring local code and weights over the network"""
+    repo_dir = _local_yolo_repo()
+    if repo_dir and os.path.exists(YOLO_WEIGHTS_PATH):
+        # Fully offline: hub code and weights are both on disk
+        return torch.hub.load(repo_dir, 'custom', path=YOLO_WEIGHTS_PATH, source='local')
     # Check if model exists, download only once
-    if not os.path.exists('yolov5s.pt'):
+    if not os.path.exists(YOLO_WEIGHTS_PATH):
         # Use torch hub to download YOLOv5
-        model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-    else:
-        model = torch.hub.load('ultralytics/yolov5', 'custom', path='yolov5s.pt')
-    return model
+        return torch.hub.load(YOLO_HUB_REPO, 'yolov5s', pretrained=True)
+    return torch.hub.load(YOLO_HUB_REPO, 'custom', path=YOLO_WEIGHTS_PATH)
 
-def is_handwritten(image_np):
-    """Detect if image contains handwriting using image characteristics"""
-    # Convert to grayscale if it's not
+def get_yolo_model():
+    """Load YOLOv5 model for handwriting detection (cached for the whole process)"""
+    global _yolo_model
+    if _yolo_model is None:
+        with _yolo_lock:
+            # Re-check: another thread may have loaded it while we waited
+            if _yolo_model is None:
+                start = time.perf_counter()
+                model = _load_yolo_model()
+                yolo_timings["load_seconds"] = time.perf_counter() - start
+                print(f"YOLO model loaded in {yolo_timings['load_seconds']:.2f}s")
+                _yolo_model = model
+    return _yolo_model
+
+def run_yolo(image_np):
+    """Run the cached YOLO model, recording inference time separately from load time"""
+    model = get_yolo_model()
+    start = time.perf_counter()
+    results = model(image_np)
+    yolo_timings["inference_seconds"] = time.perf_counter() - start
+    print(f"YOLO inference took {yolo_timings['inference_seconds']:.2f}s")
+    return results
+
+def warmup_yolo_model(background=True):
+    """Load the YOLO model and run one dummy inference ahead of the first request"""
+    global _yolo_warmup_thread
+
+    def _warmup():
+        try:
+            get_yolo_model()(np.zeros((64, 64, 3), dtype=np.uint8))
+        except Exception as e:
+            print(f"YOLO warm-up failed: {e}")
+
+    if not background:
+        _warmup()
+        return
+    with _yolo_lock:
+        if _yolo_warmup_thread is None:
+            _yolo_warmup_thread = threading.Thread(target=_warmup, name="yolo-warmup", daemon=True)
+            _yolo_warmup_thread.start()
+
+# Handwriting classifier: features are computed on a fixed-size thumbnail
+CLASSIFIER_THUMBNAIL_SIZE = 512   # Longest side in pixels; decisions match full resolution on test_images
+HANDWRITING_EDGE_DENSITY = 0.05
+HANDWRITING_STROKE_STD = 15
+_STROKE_KERNEL = np.ones((3, 3), np.uint8)
+
+def to_gray(image_np):
+    """Grayscale view of an image (returned unchanged if it already is one)"""
     if len(image_np.shape) == 3:
-        gray = cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = image_np
-        
-    # Apply Canny edge detection to find edges
-    edges = cv2.Canny(gray, 50, 150)
-    
-    # Count non-zero pixels (edges)
-    edge_count = np.count_nonzero(edges)
-    
-    # Get image dimensions
-    height, width = gray.shape
-    total_pixels = height * width
-    
-    # Calculate edge density
-    edge_density = edge_count / total_pixels
+        return cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY)
+    return image_np
+
+def downscale(gray, max_side):
+    """Shrink an image so its longest side is at most max_side pixels"""
+    height, width = gray.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return gray
+    return cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+def page_features(gray):
+    """Edge density and stroke-width variation of a grayscale page, measured on a thumbnail"""
+    gray = downscale(gray, CLASSIFIER_THUMBNAIL_SIZE)
     
-    # Estimate stroke width variation using morphological operations
-    kernel = np.ones((3, 3), np.uint8)
-    dilated = cv2.dilate(gray, kernel, iterations=1)
-    eroded = cv2.erode(gray, kernel, iterations=1)
-    stroke = cv2.subtract(dilated, eroded)
+    edge_density = np.count_nonzero(cv2.Canny(gray, 50, 150)) / gray.size
     
-    # Calculate stroke width variation
-    stroke_std = np.std(stroke[stroke > 0]) if np.count_nonzero(stroke) > 0 else 0
+    # Morphological gradient (dilate - erode) approximates stroke width
+    stroke = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, _STROKE_KERNEL)
+    strokes = stroke[stroke > 0]
+    stroke_std = float(strokes.std()) if strokes.size else 0.0
     
+    return {"edge_density": edge_density, "stroke_std": stroke_std}
+
+def is_handwritten(image_np, features=None):
+    """Detect if image contains handwriting using image characteristics"""
+    if features is None:
+        features = page_features(to_gray(image_np))
     # Handwritten text typically has higher edge density and stroke width variation
-    return edge_density > 0.05 and stroke_std > 15
+    return bool(features["edge_density"] > HANDWRITING_EDGE_DENSITY
+                and features["stroke_std"] > HANDWRITING_STROKE_STD)
 
-def preprocess_image(image_np):
+def preprocess_image(image_np, gray=None):
     """Enhance image for better OCR results"""
-    # Convert to grayscale
-    if len(image_np.shape) == 3:
-        gray = cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = image_np
+    if gray is None:
+        gray = to_gray(image_np)
     
     # Apply adaptive thresholding
     thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
@@ -82,126 +162,633 @@ def preprocess_image(image_np):
     
     return dilated
 
-def recognize_handwriting(input_file):
-    """Process handwriting in uploaded file and extract text"""
-    # Create temp file to handle uploaded file properly
-    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(input_file.name).suffix) as tmp:
-        tmp.write(input_file.getvalue())
-        temp_path = tmp.name
+# Script-aware OCR: tesseract's OSD on a downscaled page picks the minimal
+# language set per document, e.g. "hin+eng" instead of every pack at once
+MULTILINGUAL_OCR = True
+DEFAULT_OCR_LANGUAGE = "eng"
+SCRIPT_DETECTION_SIZE = 1200    # Longest side of the image OSD runs on
+MIN_SCRIPT_CONFIDENCE = 1.0     # Below this OSD's script guess is ignored
+SCRIPT_LANGUAGES = {
+    "Devanagari": "hin",
+    "Tamil": "tam",
+    "Bengali": "ben",
+    "Telugu": "tel",
+    "Kannada": "kan",
+    "Malayalam": "mal",
+    "Gujarati": "guj",
+    "Gurmukhi": "pan",
+    "Oriya": "ori",
+    "Arabic": "urd",
+}
+MAX_CACHED_DOCUMENT_LANGUAGES = 1000
+
+_document_languages = OrderedDict()
+_document_languages_lock = threading.Lock()
+
+def with_language(config, lang):
+    """Tesseract config with its -l option replaced by `lang`"""
+    _, psm, oem = parse_tesseract_config(config)
+    return f"--psm {psm} --oem {oem} -l {lang}"
+
+def detect_script(image_np):
+    """Dominant script of a page from OSD on a thumbnail, or None if it cannot tell"""
+    thumbnail = downscale(to_gray(image_np), SCRIPT_DETECTION_SIZE)
+    try:
+        script, confidence = get_ocr_engine().detect_script(Image.fromarray(thumbnail))
+    except Exception as e:
+        # OSD refuses pages with too little text, and osd.traineddata may be missing
+        print(f"Script detection failed: {e}")
+        return None
+    return script if confidence >= MIN_SCRIPT_CONFIDENCE else None
+
+def installed_languages():
+    """Installed tesseract language packs, or an empty set if tesseract cannot be queried"""
+    try:
+        return get_ocr_engine().languages()
+    except Exception as e:
+        print(f"Could not list tesseract languages: {e}")
+        return set()
+
+def languages_for_script(script):
+    """Tesseract language string for a script: its pack plus English, if the pack is installed"""
+    lang = SCRIPT_LANGUAGES.get(script)
+    if lang is None:
+        return DEFAULT_OCR_LANGUAGE
+    if lang not in installed_languages():
+        print(f"Tesseract language pack '{lang}' for {script} script is not installed, using English")
+        return DEFAULT_OCR_LANGUAGE
+    return f"{lang}+{DEFAULT_OCR_LANGUAGE}"
+
+def document_language(image_np, doc_hash=None):
+    """OCR language set for a document, detected from one page and remembered per document hash"""
+    if not MULTILINGUAL_OCR:
+        return DEFAULT_OCR_LANGUAGE
+    if doc_hash is not None:
+        with _document_languages_lock:
+            if doc_hash in _document_languages:
+                _document_languages.move_to_end(doc_hash)
+                return _document_languages[doc_hash]
+    
+    lang = languages_for_script(detect_script(image_np))
+    
+    if doc_hash is not None:
+        with _document_languages_lock:
+            _document_languages[doc_hash] = lang
+            if len(_document_languages) > MAX_CACHED_DOCUMENT_LANGUAGES:
+                _document_languages.popitem(last=False)
+    return lang
+
+# Confidence-driven re-OCR: one word-level pass per page, then a second look
+# only at the lines whose mean word confidence is low
+LOW_CONFIDENCE_THRESHOLD = 60   # Mean word confidence (0-100) below which a line is re-read
+REOCR_PSM = 6                   # Tesseract "uniform block" mode: the line crops are stacked one per row
+MAX_REOCR_LINES = 30            # Cap on re-read lines per page, least confident first
+LINE_PADDING = 4                # Pixels of context kept around a line crop
+
+def group_lines(data, line_key=None):
+    """Group image_to_data words into lines with a bounding box and word confidences, in reading order"""
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if conf < 0 or not word.strip():
+            continue
+        key = line_key or (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(
+            (data["left"][i], data["top"][i], data["width"][i], data["height"][i], conf, word.strip())
+        )
+    
+    grouped = []
+    for key in sorted(lines):
+        words = sorted(lines[key])
+        grouped.append({
+            "key": key,
+            "words": [word for *_, word in words],
+            "confs": [conf for _, _, _, _, conf, _ in words],
+            "box": (min(left for left, *_ in words),
+                    min(top for _, top, *_ in words),
+                    max(left + width for left, _, width, *_ in words),
+                    max(top + height for _, top, _, height, *_ in words)),
+        })
+    return grouped
+
+def line_confidence(line):
+    return sum(line["confs"]) / len(line["confs"])
+
+def lines_to_text(lines):
+    """Rebuild page text from grouped lines, with a blank line between paragraphs"""
+    parts = []
+    previous = None
+    for line in lines:
+        paragraph = line["key"][:2]
+        if previous is not None and paragraph != previous:
+            parts.append("")
+        parts.append(" ".join(line["words"]))
+        previous = paragraph
+    return "\n".join(parts)
+
+def reocr_lines(image, lines, config):
+    """Re-read line crops with a single engine call; returns the new line (or None) for each
+    
+    The crops are stacked on one canvas like YOLO regions (see compose_rois),
+    so the pytesseract engine starts one tesseract process per page, not per line.
+    """
+    if not lines:
+        return []
+    boxes = [(xmin - LINE_PADDING, ymin - LINE_PADDING, xmax + LINE_PADDING, ymax + LINE_PADDING)
+             for xmin, ymin, xmax, ymax in (line["box"] for line in lines)]
+    canvas, bands = compose_rois(image, boxes, preprocess=False)
+    
+    lang, _, oem = parse_tesseract_config(config)
+    data = get_ocr_engine().image_to_data(Image.fromarray(canvas), f"--psm {REOCR_PSM} --oem {oem} -l {lang}")
+    candidates = []
+    for line, indices in zip(lines, words_by_band(data, bands)):
+        band_data = {field: [data[field][i] for i in indices]
+                     for field in ("text", "conf", "left", "top", "width", "height")}
+        # Keep the original line's position in the page layout
+        candidate = group_lines(band_data, line_key=line["key"])
+        candidates.append(candidate[0] if candidate else None)
+    return candidates
+
+def ocr_with_confidence(image_np, gray=None, handwritten=None, lang=DEFAULT_OCR_LANGUAGE):
+    """OCR a page from word-level results, re-reading only its low-confidence lines.
+    
+    Handwritten pages are read from the thresholded image and re-read from the
+    plain grayscale one; printed pages the other way round. A re-read line is
+    kept only if its confidence improved. Returns a dict with the text, the mean
+    word confidence (None when no words were found), whether the page was
+    treated as handwriting, and how many lines were re-read and improved.
+    """
+    if gray is None:
+        gray = to_gray(image_np)
+    if handwritten is None:
+        handwritten = is_handwritten(image_np, page_features(gray))
+    
+    preprocessed = preprocess_image(image_np, gray) if handwritten else None
+    if handwritten:
+        config, first_image, second_image = HANDWRITTEN_TESSERACT_CONFIG, preprocessed, gray
+    else:
+        config, first_image, second_image = PRINTED_TESSERACT_CONFIG, image_np, None
+    config = with_language(config, lang)
+    lines = group_lines(get_ocr_engine().image_to_data(Image.fromarray(first_image), config))
+    
+    low_confidence = sorted(
+        (i for i, line in enumerate(lines) if line_confidence(line) < LOW_CONFIDENCE_THRESHOLD),
+        key=lambda i: line_confidence(lines[i])
+    )[:MAX_REOCR_LINES]
+    improved = 0
+    if low_confidence and second_image is None:
+        # Printed pages only pay for thresholding when some line needs it
+        second_image = preprocess_image(image_np, gray)
+    candidates = reocr_lines(second_image, [lines[i] for i in low_confidence], config)
+    for i, candidate in zip(low_confidence, candidates):
+        if candidate and line_confidence(candidate) > line_confidence(lines[i]):
+            lines[i] = candidate
+            improved += 1
+    
+    confs = [conf for line in lines for conf in line["confs"]]
+    return {
+        "text": lines_to_text(lines),
+        "confidence": sum(confs) / len(confs) if confs else None,
+        "handwritten": handwritten,
+        "reocr_lines": len(low_confidence),
+        "improved_lines": improved,
+    }
+
+# Parallel page OCR: a shared process pool, with a per-document cap on pages in flight
+OCR_MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+PDF_PAGE_PARALLELISM = 4  # 1 disables the pool and OCRs pages serially
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+def get_ocr_pool():
+    """Return the process-wide OCR worker pool, creating it on first use"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            # Spawned, not forked: forking the multi-threaded Streamlit/torch server can deadlock
+            _ocr_pool = ProcessPoolExecutor(max_workers=OCR_MAX_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _ocr_pool
+
+def ocr_page(image_np, lang=DEFAULT_OCR_LANGUAGE):
+    """OCR one page image and return its ocr_with_confidence result plus seconds; runs inside pool workers"""
+    start = time.perf_counter()
+    result = ocr_with_confidence(image_np, lang=lang)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def ocr_pages(images, parallelism=PDF_PAGE_PARALLELISM, lang=DEFAULT_OCR_LANGUAGE):
+    """OCR an iterable of page images, yielding ocr_page results in page order.
+    
+    With parallelism > 1 at most that many pages of the document are queued on
+    the process pool at once, so other documents still get a share of workers.
+    """
+    if parallelism <= 1:
+        for image_np in images:
+            yield ocr_page(image_np, lang)
+        return
+    
+    pool = get_ocr_pool()
+    pending = deque()
+    for image_np in images:
+        pending.append(pool.submit(ocr_page, image_np, lang))
+        if len(pending) >= parallelism:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+SUPPORTED_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
+SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.doc'] + SUPPORTED_IMAGE_EXTENSIONS
+
+# Results cache keyed by document content hash plus the OCR configuration
+OCR_CACHE_ENABLED = True
+
+_ocr_cache = None
+
+def get_ocr_cache():
+    """Return the process-wide OCR result cache, or None if caching is disabled"""
+    global _ocr_cache
+    if OCR_CACHE_ENABLED and _ocr_cache is None:
+        try:
+            _ocr_cache = OCRCache()
+        except sqlite3.Error as e:
+            print(f"OCR cache unavailable: {e}")
+    return _ocr_cache
+
+def ocr_config():
+    """Settings that change OCR output; part of every cache key"""
+    return {
+        "handwritten": HANDWRITTEN_TESSERACT_CONFIG,
+        "printed": PRINTED_TESSERACT_CONFIG,
+        "low_confidence_threshold": LOW_CONFIDENCE_THRESHOLD,
+        "reocr_psm": REOCR_PSM,
+        "max_reocr_lines": MAX_REOCR_LINES,
+        "multilingual": MULTILINGUAL_OCR,
+        "script_detection_size": SCRIPT_DETECTION_SIZE,
+        "min_script_confidence": MIN_SCRIPT_CONFIDENCE,
+        "script_languages": SCRIPT_LANGUAGES,
+        "installed_languages": sorted(installed_languages()) if MULTILINGUAL_OCR else [],
+        "dpi": OCR_DPI,
+        "min_page_text_chars": MIN_PAGE_TEXT_CHARS,
+        "min_text_density": MIN_TEXT_DENSITY,
+        "max_image_coverage": MAX_IMAGE_COVERAGE,
+        "yolo_weights": YOLO_WEIGHTS_PATH,
+        "engine": get_ocr_engine().name,
+    }
+
+def is_ocr_error(text):
+    """True for the error/unsupported messages returned instead of document text"""
+    return text.startswith(("Error processing", "Unsupported file format"))
+
+def _count_cache_lookup(stats, hit):
+    if stats is not None:
+        counter = "cache_hits" if hit else "cache_misses"
+        stats[counter] = stats.get(counter, 0) + 1
+
+def recognize_handwriting(input_file, stats=None):
+    """Process handwriting in uploaded file and extract text
+    
+    Results are cached by SHA-256 of the uploaded bytes (per page for PDFs),
+    so Streamlit reruns do not OCR the same upload again. If a `stats` dict
+    is passed it receives cache hit/miss counts, OCR timings and the mean
+    word confidence of freshly OCR'd content.
+    """
+    return recognize_document(input_file.getvalue(), input_file.name, stats=stats)
+
+def recognize_handwriting_pages(input_file, stats=None):
+    """Like recognize_handwriting, but yields (page number, text) as each page is ready"""
+    return recognize_document_pages(input_file.getvalue(), input_file.name, stats=stats)
+
+def recognize_document_pages(file_bytes, file_name, parallelism=PDF_PAGE_PARALLELISM, stats=None):
+    """Yield (page number, text) as pages finish: PDFs page by page, other files as a single page 1
+    
+    A PDF that fails part-way yields the pages read so far, then the error
+    message with page number None.
+    """
+    if Path(file_name).suffix.lower() != '.pdf':
+        yield 1, recognize_document(file_bytes, file_name, parallelism, stats)
+        return
     
+    doc_hash = hashlib.sha256(file_bytes).hexdigest()
     try:
-        # Determine file type by extension
-        file_ext = Path(input_file.name).suffix.lower()
-        
-        if file_ext in ['.pdf']:
-            extracted_text = extract_text_from_pdf(temp_path)
-        elif file_ext in ['.docx', '.doc']:
-            extracted_text = extract_text_from_docx(temp_path)
-        elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']:
-            extracted_text = extract_text_from_image(temp_path)
-        else:
-            extracted_text = "Unsupported file format. Please upload PDF, DOCX, or common image formats."
+        yield from iter_pdf_pages(file_bytes, parallelism, stats=stats, doc_hash=doc_hash)
+    except Exception as e:
+        yield None, f"Error processing PDF: {str(e)}"
+
+def recognize_document(file_bytes, file_name, parallelism=PDF_PAGE_PARALLELISM, stats=None):
+    """Extract text from a document held in memory; the file type comes from `file_name`"""
+    file_ext = Path(file_name).suffix.lower()
+    doc_hash = hashlib.sha256(file_bytes).hexdigest()
+    cache = get_ocr_cache()
     
-    finally:
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+    # PDFs are cached page by page inside extract_text_from_pdf
+    cache_key = None
+    if cache is not None and file_ext != '.pdf':
+        cache_key = make_cache_key(doc_hash, ocr_config())
+        cached_text = cache.get(cache_key)
+        _count_cache_lookup(stats, cached_text is not None)
+        if cached_text is not None:
+            return cached_text
+    
+    # Decode straight from the upload buffer; no temp file round-trip
+    if file_ext in ['.pdf']:
+        extracted_text = extract_text_from_pdf(file_bytes, parallelism, stats=stats, doc_hash=doc_hash)
+    elif file_ext in ['.docx', '.doc']:
+        extracted_text = extract_text_from_docx(file_bytes)
+    elif file_ext in SUPPORTED_IMAGE_EXTENSIONS:
+        extracted_text = extract_text_from_image(file_bytes, stats=stats, doc_hash=doc_hash)
+    else:
+        extracted_text = "Unsupported file format. Please upload PDF, DOCX, or common image formats."
+    
+    if cache_key is not None and not is_ocr_error(extracted_text):
+        cache.put(cache_key, extracted_text)
     
     return extracted_text
 
-def extract_text_from_pdf(file_path):
-    """Extract text from PDF files, handling both digital and scanned content"""
-    full_text = ""
+# Resolution used to rasterize scanned PDF pages for OCR
+OCR_DPI = 200
+
+# Per-page digital/OCR decision for PDFs
+MIN_PAGE_TEXT_CHARS = 50    # Less digital text than this and the page is OCR'd
+# Characters per square inch above which an image-covered page is taken to carry a text layer
+# (e.g. a searchable scan). Full text pages of test_images/paperx.pdf measure 46-100; a scan
+# with only a header or footer in text measures a few.
+MIN_TEXT_DENSITY = 15
+MAX_IMAGE_COVERAGE = 0.5    # Pages mostly covered by images need OCR unless they carry a text layer
+
+def iter_page_images(doc, dpi=OCR_DPI, page_numbers=None):
+    """Render pages of an open fitz document one at a time as RGB NumPy arrays"""
+    if page_numbers is None:
+        page_numbers = range(len(doc))
+    for page_num in page_numbers:
+        pix = doc.load_page(page_num).get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+        # Wrap the pixmap's sample buffer directly; only this page is held in memory
+        yield np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+def page_needs_ocr(page, page_text):
+    """Decide from text density and image coverage whether a page lacks a usable text layer"""
+    text_chars = len(page_text.strip())
+    if text_chars < MIN_PAGE_TEXT_CHARS:
+        return True
     
-    try:
-        # First try PyMuPDF for digital PDF text extraction
-        doc = fitz.open(file_path)
-        digital_text = ""
-        
+    page_area = abs(page.rect)
+    if page_area == 0:
+        return False
+    
+    # Fraction of the page covered by embedded images (e.g. a scanned lab sheet)
+    image_area = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    image_coverage = min(image_area / page_area, 1.0)
+    
+    # PDF units are points, 72 per inch
+    text_density = text_chars / (page_area / (72 * 72))
+    
+    return image_coverage > MAX_IMAGE_COVERAGE and text_density < MIN_TEXT_DENSITY
+
+def iter_pdf_pages(source, parallelism=PDF_PAGE_PARALLELISM, dpi=OCR_DPI, stats=None, doc_hash=None):
+    """Yield (page number, text) for every page of a PDF in order, as soon as each page is ready
+    
+    Each page is taken from the digital text layer when it has one and OCR'd
+    otherwise; later pages keep OCRing in the pool while earlier ones are
+    consumed. With a `doc_hash`, OCR'd pages are looked up in and saved to
+    the OCR cache individually. If a `stats` dict is passed it receives the
+    digital/OCR page counts, cache hits/misses, per-page OCR timings and
+    confidences, the number of re-read lines and the OCR language set once
+    the last page has been yielded.
+    
+    `source` is a file path or the raw PDF bytes.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    
+    with doc:
+        # First try PyMuPDF for digital text extraction, page by page
+        page_texts = []
+        ocr_page_numbers = []
         for page_num in range(len(doc)):
             page = doc.load_page(page_num)
-            digital_text += page.get_text()
+            page_text = page.get_text()
+            page_texts.append(page_text)
+            if page_needs_ocr(page, page_text):
+                ocr_page_numbers.append(page_num)
+        
+        # Reuse cached OCR text for pages seen before
+        cache = get_ocr_cache() if doc_hash else None
+        page_keys = {}
+        pages_to_ocr = []
+        for page_num in ocr_page_numbers:
+            if cache is None:
+                pages_to_ocr.append(page_num)
+                continue
+            page_keys[page_num] = make_cache_key(doc_hash, ocr_config(), page=page_num)
+            cached_text = cache.get(page_keys[page_num])
+            _count_cache_lookup(stats, cached_text is not None)
+            if cached_text is None:
+                pages_to_ocr.append(page_num)
+            else:
+                page_texts[page_num] = cached_text
         
-        # If digital text extraction yields significant content, use it
-        if len(digital_text.strip()) > 100:  # Arbitrary threshold
-            return digital_text
+        # OCR only the pages without a usable text layer, rendering them lazily
+        # from the already-open document instead of rasterizing them all up front
+        page_images = iter_page_images(doc, dpi, pages_to_ocr)
         
-        # Otherwise, treat as scanned PDF and use OCR
-        images = pdf2image.convert_from_path(file_path)
+        # The first page to OCR decides the document's language set
+        lang = DEFAULT_OCR_LANGUAGE
+        first_image = next(page_images, None)
+        if first_image is not None:
+            lang = document_language(first_image, doc_hash)
+            page_images = chain([first_image], page_images)
         
-        for i, image in enumerate(images):
-            # Convert PIL Image to numpy array for OpenCV
-            image_np = np.array(image)
-            
-            # Check if page contains handwriting
-            if is_handwritten(image_np):
-                # Use handwritten-specific OCR settings
-                preprocessed = preprocess_image(image_np)
-                page_text = pytesseract.image_to_string(
-                    Image.fromarray(preprocessed),
-                    config='--psm 6 --oem 1 -l eng'
-                )
-            else:
-                # Use standard OCR settings for printed text
-                page_text = pytesseract.image_to_string(
-                    image,
-                    config='--psm 3 --oem 1 -l eng'
-                )
-            
-            full_text += f"\n--- Page {i+1} ---\n{page_text}\n"
+        ocr_results = ocr_pages(page_images, parallelism, lang)
+        waiting_for_ocr = set(pages_to_ocr)
+        page_seconds = []
+        page_confidence = []
+        reocr_lines = 0
+        for page_num in range(len(page_texts)):
+            if page_num in waiting_for_ocr:
+                # ocr_pages yields in page order, so this is the result for page_num
+                result = next(ocr_results)
+                page_texts[page_num] = result["text"]
+                page_seconds.append(result["seconds"])
+                page_confidence.append(result["confidence"])
+                reocr_lines += result["reocr_lines"]
+                if cache is not None:
+                    cache.put(page_keys[page_num], result["text"])
+            yield page_num + 1, page_texts[page_num]
+        
+        if stats is not None:
+            stats["digital_pages"] = len(page_texts) - len(ocr_page_numbers)
+            stats["ocr_pages"] = len(ocr_page_numbers)
+            stats["page_seconds"] = page_seconds
+            stats["page_confidence"] = page_confidence
+            stats["reocr_lines"] = reocr_lines
+            if pages_to_ocr:
+                stats["language"] = lang
+            scored = [conf for conf in page_confidence if conf is not None]
+            if scored:
+                stats["confidence"] = sum(scored) / len(scored)
+
+def extract_text_from_pdf(source, parallelism=PDF_PAGE_PARALLELISM, dpi=OCR_DPI, stats=None, doc_hash=None):
+    """Extract text from PDF files, handling both digital and scanned content
+    
+    Pages come from iter_pdf_pages, which documents the caching and `stats`.
+    """
+    try:
+        full_text = ""
+        for page_number, page_text in iter_pdf_pages(source, parallelism, dpi, stats, doc_hash):
+            full_text += f"\n--- Page {page_number} ---\n{page_text}\n"
         
         return full_text.strip()
     
     except Exception as e:
         return f"Error processing PDF: {str(e)}"
 
-def extract_text_from_docx(file_path):
-    """Extract text from DOCX files"""
+def extract_text_from_docx(source):
+    """Extract text from DOCX files (path or raw bytes)"""
     try:
-        text = docx2txt.process(file_path)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = BytesIO(source)
+        text = docx2txt.process(source)
         return text
     except Exception as e:
         return f"Error processing DOCX: {str(e)}"
 
-def extract_text_from_image(file_path):
-    """Extract text from image files with handwriting detection"""
+# YOLO region OCR: detections above the threshold are OCR'd together on one canvas
+YOLO_CONF_THRESHOLD = 0.35
+MAX_YOLO_ROIS = 40   # Cap on regions per image (most confident first)
+ROI_PADDING = 20     # Blank pixels around each region on the canvas
+
+def merge_overlapping_boxes(boxes):
+    """Merge overlapping (xmin, ymin, xmax, ymax) boxes and return them in reading order"""
+    merged = list(boxes)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i], merged[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    merged[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return sorted(merged, key=lambda box: (box[1], box[0]))
+
+def compose_rois(image_np, boxes, preprocess=True):
+    """Stack (preprocessed) crops vertically on one white canvas.
+    
+    Without `preprocess`, `image_np` must already be a single-channel image.
+    Returns the canvas and, per box, the (top, bottom) band it occupies.
+    """
+    height, width = image_np.shape[:2]
+    crops = []
+    for xmin, ymin, xmax, ymax in boxes:
+        roi = image_np[max(ymin, 0):min(ymax, height), max(xmin, 0):min(xmax, width)]
+        if roi.size == 0:
+            crops.append(None)
+        else:
+            crops.append(preprocess_image(roi) if preprocess else roi)
+    
+    canvas_width = max([crop.shape[1] for crop in crops if crop is not None] + [1]) + 2 * ROI_PADDING
+    canvas_height = sum(crop.shape[0] + ROI_PADDING for crop in crops if crop is not None) + ROI_PADDING
+    canvas = np.full((canvas_height, canvas_width), 255, dtype=np.uint8)
+    
+    bands = []
+    y = ROI_PADDING
+    for crop in crops:
+        if crop is None:
+            bands.append(None)
+            continue
+        canvas[y:y + crop.shape[0], ROI_PADDING:ROI_PADDING + crop.shape[1]] = crop
+        bands.append((y, y + crop.shape[0]))
+        y += crop.shape[0] + ROI_PADDING
+    return canvas, bands
+
+def words_by_band(data, bands):
+    """Indices of the recognized words whose vertical centre falls in each canvas band"""
+    band_words = [[] for _ in bands]
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        centre = data["top"][i] + data["height"][i] / 2
+        for index, band in enumerate(bands):
+            if band and band[0] <= centre <= band[1]:
+                band_words[index].append(i)
+                break
+    return band_words
+
+def ocr_rois(image_np, boxes, lang=DEFAULT_OCR_LANGUAGE):
+    """OCR all regions with a single engine call and return the text of each box"""
+    if not boxes:
+        return []
+    
+    canvas, bands = compose_rois(image_np, boxes)
+    data = get_ocr_engine().image_to_data(Image.fromarray(canvas), with_language(HANDWRITTEN_TESSERACT_CONFIG, lang))
+    
+    # Assign every recognized word to the region whose band contains its centre
+    box_lines = [{} for _ in boxes]
+    for index, indices in enumerate(words_by_band(data, bands)):
+        for i in indices:
+            line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            box_lines[index].setdefault(line_key, []).append((data["left"][i], data["text"][i]))
+    
+    # Rebuild each region's text line by line, words left to right
+    texts = []
+    for lines in box_lines:
+        texts.append("\n".join(
+            " ".join(word for _, word in sorted(lines[line_key])) for line_key in sorted(lines)
+        ))
+    return texts
+
+def load_image(source):
+    """Read an image as a BGR array from a file path or from encoded bytes in memory"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return cv2.imread(source)
+
+def extract_text_from_image(source, stats=None, doc_hash=None):
+    """Extract text from image files (path or raw bytes) with handwriting detection
+    
+    If a `stats` dict is passed it receives the mean word confidence, the
+    number of re-read lines, the OCR language set and whether the YOLO
+    region pass ran. A `doc_hash` lets the detected language be reused.
+    """
     try:
         # Read the image
-        image_np = cv2.imread(file_path)
+        image_np = load_image(source)
         
-        # Check if image contains handwriting
-        handwritten = is_handwritten(image_np)
+        # Word-level OCR in the document's script; only low-confidence lines get a second look
+        lang = document_language(image_np, doc_hash)
+        result = ocr_with_confidence(image_np, lang=lang)
+        text = result["text"]
+        if stats is not None:
+            stats["confidence"] = result["confidence"]
+            stats["reocr_lines"] = result["reocr_lines"]
+            stats["language"] = lang
         
-        if handwritten:
-            # Apply special preprocessing for handwritten text
-            preprocessed = preprocess_image(image_np)
-            
-            # Use specialized OCR settings for handwriting
-            text = pytesseract.image_to_string(
-                Image.fromarray(preprocessed),
-                config='--psm 6 --oem 1 -l eng'
-            )
-            
-            # If text is still sparse, try YOLO for handwriting detection
-            if len(text.strip().split()) < 10:
+        if result["handwritten"]:
+            # If text is sparse and poorly recognized, try YOLO for handwriting detection;
+            # a few confidently read words just mean a short note
+            confidence = result["confidence"]
+            if len(text.split()) < 10 and (confidence is None or confidence < LOW_CONFIDENCE_THRESHOLD):
                 # Use YOLO to detect handwritten regions
-                model = get_yolo_model()
-                results = model(image_np)
+                results = run_yolo(image_np)
                 
-                # Extract detected regions and perform OCR on each
-                detected_text = ""
-                for i, (xmin, ymin, xmax, ymax, conf, cls) in enumerate(results.xyxy[0]):
-                    if conf > 0.35:  # Confidence threshold
-                        # Extract the region
-                        roi = image_np[int(ymin):int(ymax), int(xmin):int(xmax)]
-                        if roi.size > 0:
-                            # Preprocess and OCR the region
-                            roi_processed = preprocess_image(roi)
-                            region_text = pytesseract.image_to_string(
-                                Image.fromarray(roi_processed),
-                                config='--psm 6 --oem 1 -l eng'
-                            )
-                            detected_text += region_text + "\n"
+                # Keep the most confident detections, merge overlaps and OCR them in one pass
+                detections = [
+                    (float(conf), (int(xmin), int(ymin), int(xmax), int(ymax)))
+                    for xmin, ymin, xmax, ymax, conf, cls in results.xyxy[0].tolist()
+                    if conf > YOLO_CONF_THRESHOLD
+                ]
+                detections.sort(reverse=True)
+                boxes = merge_overlapping_boxes([box for _, box in detections[:MAX_YOLO_ROIS]])
+                detected_text = "\n".join(ocr_rois(image_np, boxes, lang))
+                if stats is not None:
+                    stats["yolo_fallback"] = True
                 
                 # Use detected text if better than initial OCR
                 if len(detected_text.strip()) > len(text.strip()):
@@ -209,11 +796,6 @@ def extract_text_from_image(file_path):
                 
             return "Handwritten Text Detected:\n" + text
         else:
-            # Standard OCR for printed text
-            text = pytesseract.image_to_string(
-                image_np,
-                config='--psm 3 --oem 1 -l eng'
-            )
             return text
     
     except Exception as e:
@@ -221,44 +803,33 @@ def extract_text_from_image(file_path):
 
 def extract_medical_entities(text):
     """Extract medical entities from the OCR text (medications, dosages, lab values)"""
-    # Basic medical entity extraction - in a real app, you'd use a more sophisticated NER model
-    
-    # Common medication names and their variations
-    common_meds = [
-        'acetaminophen', 'tylenol', 'paracetamol', 'ibuprofen', 'advil', 'motrin',
-        'aspirin', 'lisinopril', 'metformin', 'lipitor', 'atorvastatin', 'amoxicillin',
-        'metoprolol', 'amlodipine', 'albuterol', 'omeprazole', 'losartan', 'gabapentin',
-        'hydrochlorothiazide', 'hctz', 'simvastatin', 'levothyroxine', 'azithromycin'
-    ]
-    
-    # Lab test markers
-    lab_tests = [
-        'wbc', 'rbc', 'hgb', 'hct', 'platelets', 'glucose', 'bun', 'creatinine', 'sodium',
-        'potassium', 'chloride', 'calcium', 'cholesterol', 'triglycerides', 'hdl', 'ldl',
-        'a1c', 'tsh', 't3', 't4', 'alt', 'ast', 'alp', 'ggt', 'total bilirubin'
-    ]
-    
-    # Extract medications
+    # Lexicon-based extraction - in a real app, you'd use a more sophisticated NER model.
+    # The matcher is compiled once from data/medical_lexicon.tsv and finds every
+    # whole-word occurrence of every drug/lab alias in a single pass.
     medications = []
-    for med in common_meds:
-        if med.lower() in text.lower():
+    lab_values = []
+    entities = []
+    covered_until = 0
+    for match in get_entity_matcher().find_all(text):
+        # Prefer the longest match, e.g. "total bilirubin" over "bilirubin"
+        if match["start"] < covered_until:
+            continue
+        covered_until = match["end"]
+        entities.append(match)
+        
+        if match["category"] == "medication":
             # Try to find dosage near medication name
-            med_index = text.lower().find(med.lower())
-            context = text[max(0, med_index-20):min(len(text), med_index+50)]
+            context = text[max(0, match["start"]-20):min(len(text), match["start"]+50)]
             medications.append(context)
-    
-    # Extract lab values
-    lab_values = []
-    for lab in lab_tests:
-        if lab.lower() in text.lower():
+        elif match["category"] == "lab":
             # Try to find value near lab test name
-            lab_index = text.lower().find(lab.lower())
-            context = text[max(0, lab_index-10):min(len(text), lab_index+30)]
+            context = text[max(0, match["start"]-10):min(len(text), match["start"]+30)]
             lab_values.append(context)
     
     return {
         "medications": medications,
         "lab_values": lab_values,
+        "entities": entities,
         "full_text": text
     }
 
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+OCR_CACHE_PATH = os.path.join(".ocr_cache", "ocr_cache.sqlite3")
+OCR_CACHE_MAX_ENTRIES = 5000
+
+
+def make_cache_key(doc_hash, config, page=None):
+    """Cache key for a document (or one PDF page) under a given OCR configuration"""
+    payload = json.dumps({"doc": doc_hash, "page": page, "config": config}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class OCRCache():
+    """Persistent LRU cache of OCR text, stored in a small SQLite database.
+
+    Entries are keyed by make_cache_key(); every hit refreshes the entry's
+    last-used time and the least recently used entries are dropped once the
+    cache grows beyond max_entries. Database errors (e.g. "database is locked"
+    with many worker processes) turn a lookup into a miss and skip a write,
+    so the cache never fails the OCR itself.
+    """
+
+    def __init__(self, path=OCR_CACHE_PATH, max_entries=OCR_CACHE_MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return cached text or None, counting the hit or miss"""
+        with self._lock:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute("SELECT text FROM ocr_results WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        conn.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+            except sqlite3.Error as e:
+                print(f"OCR cache lookup failed: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, text):
+        """Store text and evict least recently used entries beyond the size limit"""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_results (key, text, last_used) VALUES (?, ?, ?)",
+                    (key, text, time.time())
+                )
+                conn.execute(
+                    "DELETE FROM ocr_results WHERE key IN ("
+                    "SELECT key FROM ocr_results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            print(f"OCR cache write skipped: {e}")
+
+    def stats(self):
+        """Hit/miss counters for this process and the number of stored entries"""
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
@@ -0,0 +1,196 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+# Optional in-process Tesseract bindings: pip install tesserocr
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+OCR_ENGINE = "auto"          # "auto", "tesserocr" or "pytesseract"
+OCR_ENGINE_POOL_SIZE = 4     # Idle initialized engines kept per (lang, psm, oem)
+OSD_CONFIG = "--psm 0"       # Orientation and script detection only (needs osd.traineddata)
+
+
+def parse_tesseract_config(config):
+    """Split a tesseract CLI config like '--psm 6 --oem 1 -l eng' into (lang, psm, oem)"""
+    lang, psm, oem = "eng", 3, 1
+    tokens = config.split()
+    for flag, value in zip(tokens, tokens[1:]):
+        if flag == "-l":
+            lang = value
+        elif flag == "--psm":
+            psm = int(value)
+        elif flag == "--oem":
+            oem = int(value)
+    return lang, psm, oem
+
+
+def to_pil(image):
+    """Accept PIL images or NumPy arrays, the way pytesseract does"""
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return image
+
+
+class PytesseractEngine():
+    """Runs the tesseract binary once per call (a subprocess plus a temp image file)"""
+
+    name = "pytesseract"
+
+    def __init__(self) -> None:
+        self._languages = None
+
+    def languages(self):
+        """Installed tesseract language packs"""
+        if self._languages is None:
+            self._languages = set(pytesseract.get_languages(config=""))
+        return self._languages
+
+    def detect_script(self, image):
+        """Dominant script name and its confidence from tesseract's OSD"""
+        osd = pytesseract.image_to_osd(image, config=OSD_CONFIG, output_type=pytesseract.Output.DICT)
+        return osd["script"], float(osd["script_conf"])
+
+    def image_to_string(self, image, config):
+        return pytesseract.image_to_string(image, config=config)
+
+    def image_to_data(self, image, config):
+        """Word-level results as a dict of lists, like pytesseract's Output.DICT"""
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+
+
+class TesserocrEngine():
+    """In-process Tesseract API with a pool of initialized engines per language/PSM.
+
+    Initializing Tesseract (loading traineddata) is the expensive part, so
+    engines are reused across calls; each one is used by one thread at a time.
+    Language packs are loaded lazily, the first time a language set is used.
+    Calls that fail in tesserocr fall back to pytesseract.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, pool_size=OCR_ENGINE_POOL_SIZE) -> None:
+        self.pool_size = pool_size
+        self.fallback = PytesseractEngine()
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._languages = None
+
+    def languages(self):
+        """Installed tesseract language packs"""
+        if self._languages is None:
+            self._languages = set(tesserocr.get_languages()[1])
+        return self._languages
+
+    def detect_script(self, image):
+        """Dominant script name and its confidence from tesseract's OSD"""
+        try:
+            # OSD runs on the legacy engine, so it gets its own pooled instance
+            with self._api("osd", 0, 0) as api:
+                api.SetImage(to_pil(image))
+                osd = api.DetectOrientationScript()
+            if not osd:
+                raise RuntimeError("no orientation/script result")
+            return osd["script_name"], float(osd["script_conf"])
+        except RuntimeError as e:
+            print(f"tesserocr failed ({e}), falling back to pytesseract")
+            return self.fallback.detect_script(image)
+
+    def _pool(self, key):
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = queue.LifoQueue()
+            return self._pools[key]
+
+    @contextmanager
+    def _api(self, lang, psm, oem):
+        """Borrow an initialized engine for this configuration, creating one if none is idle"""
+        pool = self._pool((lang, psm, oem))
+        try:
+            api = pool.get_nowait()
+        except queue.Empty:
+            api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=oem)
+        try:
+            yield api
+        finally:
+            if pool.qsize() < self.pool_size:
+                pool.put(api)
+            else:
+                api.End()
+
+    def image_to_string(self, image, config):
+        lang, psm, oem = parse_tesseract_config(config)
+        try:
+            with self._api(lang, psm, oem) as api:
+                api.SetImage(to_pil(image))
+                return api.GetUTF8Text()
+        except RuntimeError as e:
+            print(f"tesserocr failed ({e}), falling back to pytesseract")
+            return self.fallback.image_to_string(image, config)
+
+    def image_to_data(self, image, config):
+        """Word-level results in the same dict-of-lists layout as pytesseract's Output.DICT"""
+        lang, psm, oem = parse_tesseract_config(config)
+        data = {key: [] for key in ("block_num", "par_num", "line_num", "word_num",
+                                    "left", "top", "width", "height", "conf", "text")}
+        try:
+            with self._api(lang, psm, oem) as api:
+                api.SetImage(to_pil(image))
+                api.Recognize()
+                iterator = api.GetIterator()
+                if iterator is None:
+                    return data
+                block = par = line = word = 0
+                for word_iter in tesserocr.iterate_level(iterator, tesserocr.RIL.WORD):
+                    if word_iter.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                        block, par, line = block + 1, 0, 0
+                    if word_iter.IsAtBeginningOf(tesserocr.RIL.PARA):
+                        par, line = par + 1, 0
+                    if word_iter.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                        line, word = line + 1, 0
+                    word += 1
+                    bbox = word_iter.BoundingBox(tesserocr.RIL.WORD)
+                    if bbox is None:
+                        continue
+                    x1, y1, x2, y2 = bbox
+                    data["block_num"].append(block)
+                    data["par_num"].append(par)
+                    data["line_num"].append(line)
+                    data["word_num"].append(word)
+                    data["left"].append(x1)
+                    data["top"].append(y1)
+                    data["width"].append(x2 - x1)
+                    data["height"].append(y2 - y1)
+                    data["conf"].append(word_iter.Confidence(tesserocr.RIL.WORD))
+                    data["text"].append(word_iter.GetUTF8Text(tesserocr.RIL.WORD))
+            return data
+        except RuntimeError as e:
+            print(f"tesserocr failed ({e}), falling back to pytesseract")
+            return self.fallback.image_to_data(image, config)
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_ocr_engine(name=None):
+    """Return the shared OCR engine for this process (one instance per engine name)"""
+    name = name or OCR_ENGINE
+    if name == "auto":
+        name = "tesserocr" if TESSEROCR_AVAILABLE else "pytesseract"
+    if name == "tesserocr" and not TESSEROCR_AVAILABLE:
+        print("tesserocr is not installed, using pytesseract")
+        name = "pytesseract"
+
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = TesserocrEngine() if name == "tesserocr" else PytesseractEngine()
+        return _engines[name]
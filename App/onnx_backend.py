@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import torch
+
+# Optional CPU inference backend: pip install onnx onnxruntime
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+PYTORCH_BACKEND = "PyTorch"
+ONNX_BACKEND = "ONNX Runtime"
+ONNX_INT8_BACKEND = "ONNX Runtime int8"
+
+ONNX_DIR = os.path.join("weights", "onnx")   # Exported models, named after the source weights hash
+ONNX_OPSET = 17
+EXPORT_IMAGE_SIZE = 640    # Sample input size for tracing; height and width stay dynamic for torchvision models
+ORT_THREADS = os.cpu_count() or 1
+
+
+def available_backends():
+    """Backends selectable in the Sidebar; the ONNX ones need onnxruntime installed"""
+    if ORT_AVAILABLE:
+        return [PYTORCH_BACKEND, ONNX_BACKEND, ONNX_INT8_BACKEND]
+    return [PYTORCH_BACKEND]
+
+
+def onnx_path(name, weights_hash, quantized=False):
+    """Where the exported (and optionally int8-quantized) copy of a model lives"""
+    slug = "".join(ch if ch.isalnum() else "_" for ch in name.lower()).strip("_")
+    suffix = "-int8" if quantized else ""
+    return os.path.join(ONNX_DIR, f"{slug}-{weights_hash[:12]}{suffix}.onnx")
+
+
+def quantize_onnx(fp32_path, int8_path):
+    """Dynamic int8 quantization: weights stored as int8, activations quantized at run time"""
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def session_options():
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = ORT_THREADS
+    return options
+
+
+def export_detector(model, path):
+    """Export a torchvision detector (Faster R-CNN, SSD) taking one (3, H, W) image"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    model.eval()
+    sample = [torch.rand(3, EXPORT_IMAGE_SIZE, EXPORT_IMAGE_SIZE)]
+    torch.onnx.export(
+        model, (sample,), path,
+        opset_version=ONNX_OPSET,
+        input_names=["image"],
+        output_names=["boxes", "labels", "scores"],
+        dynamic_axes={
+            "image": {1: "height", 2: "width"},
+            "boxes": {0: "detections"},
+            "labels": {0: "detections"},
+            "scores": {0: "detections"},
+        },
+    )
+    return path
+
+
+class OnnxDetector():
+    """ONNX Runtime stand-in for a torchvision detector.
+
+    Called like the PyTorch model (a batch tensor or a list of (3, H, W)
+    tensors) and returns the same list of boxes/labels/scores dicts, so
+    rcnnres.make_prediction and the drawing code work unchanged.
+    """
+
+    training = False
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.size_mb = os.path.getsize(path) / 2 ** 20
+        self.session = ort.InferenceSession(path, session_options(), providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, images):
+        preds = []
+        # The exported graph takes one image; batches run image by image
+        for image in images:
+            boxes, labels, scores = self.session.run(None, {self.input_name: image.detach().cpu().numpy()})
+            preds.append({
+                "boxes": torch.from_numpy(boxes),
+                "labels": torch.from_numpy(labels.astype(np.int64)),
+                "scores": torch.from_numpy(scores),
+            })
+        return preds
+
+
+def load_detector_onnx(weights_path, name, weights_hash, build, quantize=False):
+    """Load a torchvision detector through ONNX Runtime, exporting/quantizing it on first use"""
+    fp32_path = onnx_path(name, weights_hash)
+    if not os.path.exists(fp32_path):
+        print(f"Exporting {name} to {fp32_path}")
+        export_detector(build(weights_path), fp32_path)
+    path = fp32_path
+    if quantize:
+        path = onnx_path(name, weights_hash, quantized=True)
+        if not os.path.exists(path):
+            quantize_onnx(fp32_path, path)
+    return OnnxDetector(path)
+
+
+def load_yolo_onnx(weights_path, name, weights_hash, quantize=False):
+    """Load YOLOv8 through ONNX Runtime; ultralytics runs .onnx files with the same predict() API
+
+    The export has a dynamic batch axis so model_registry.predict_yolo_batch can send several images per call.
+    """
+    from ultralytics import YOLO
+    fp32_path = onnx_path(name, weights_hash)
+    if not os.path.exists(fp32_path):
+        print(f"Exporting {name} to {fp32_path}")
+        os.makedirs(ONNX_DIR, exist_ok=True)
+        exported = YOLO(weights_path).export(format="onnx", imgsz=EXPORT_IMAGE_SIZE, opset=ONNX_OPSET, dynamic=True)
+        os.replace(exported, fp32_path)
+    path = fp32_path
+    if quantize:
+        path = onnx_path(name, weights_hash, quantized=True)
+        if not os.path.exists(path):
+            quantize_onnx(fp32_path, path)
+    return YOLO(path, task="detect")
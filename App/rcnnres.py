@@ -5,20 +5,24 @@ from torchvision.models.detection.faster_rcnn import FastRCNNPredictor
 from torchvision.models.detection.ssd import SSD
 import torch.nn as nn
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+import cv2
 from PIL import Image
 import numpy as np
 import os
+
+from model_registry import batch_size_for
 classes=['elbow positive', 'fingers positive', 'forearm fracture', 'humerus fracture', 'humerus', 'shoulder fracture', 'wrist positive']
 num_classes = 7
 
-def get_model():
+BOX_COLOR = (255, 165, 0)      # Orange, in RGB
+LABEL_TEXT_COLOR = (0, 0, 0)
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+def get_model(model_path=os.path.join("weights", "Resnet.pt")):
   
     model=torchvision.models.detection.fasterrcnn_resnet50_fpn(preTrained=True)
     in_features = model.roi_heads.box_predictor.cls_score.in_features
     model.roi_heads.box_predictor = FastRCNNPredictor(in_features, num_classes=7)
-    model_path = os.path.join("weights", "Resnet.pt")
     model.load_state_dict(torch.load(model_path, map_location='cpu'))
     
 
@@ -35,52 +39,119 @@ def get_vgg_model():
     return model
 
 
+def filter_prediction(pred, threshold):
+    """Keep the detections of one image that score above threshold, using one boolean mask"""
+    keep = pred['scores'] > threshold
+    return {key: value[keep] for key, value in pred.items()}
+
+
+def predict_raw(model, img):
+    """Run a detector on a batch and return its unthresholded prediction dicts, one per image
+
+    `img` is a (N, C, H, W) tensor or a list of (C, H, W) tensors.
+    """
+    # Models from the registry are already in eval mode
+    if model.training:
+        model.eval()
+    with torch.inference_mode():
+        return model(img)
+
+
 def make_prediction(model, img, threshold):
-    model.eval()
-    #model.to(D).eval()
-    preds = model(img)
-    for id in range(len(preds)) :
-        idx_list = []
-
-        for idx, score in enumerate(preds[id]['scores']) :
-            if score > threshold : 
-                idx_list.append(idx)
-
-        preds[id]['boxes'] = preds[id]['boxes'][idx_list]
-        preds[id]['labels'] = preds[id]['labels'][idx_list]
-        preds[id]['scores'] = preds[id]['scores'][idx_list]
-    
-    return preds
+    """Run a detector on a batch and return one thresholded prediction dict per image"""
+    return [filter_prediction(pred, threshold) for pred in predict_raw(model, img)]
 
 
-def plot_image_from_output(img, annotation):
-    
-    img = img.cpu().detach().permute(1, 2, 0).numpy()    
-    fig,ax = plt.subplots(1)
-    ax.imshow(img)
-    ax.axis('off')
-    
-    class_name = None
-    
-    if annotation and "scores" in annotation and len(annotation["scores"]) > 0:
-        max_score_idx = torch.argmax(annotation["scores"][0])
+# Batched inference: images are letterboxed to one square size and run in memory-sized batches
+BATCH_IMAGE_SIZE = 800
 
-        # Extract the coordinates of the bounding box with the highest score
-        xmin, ymin, xmax, ymax = annotation["boxes"][max_score_idx].detach().cpu().numpy()
-        label_idx = annotation["labels"][max_score_idx]
-        
-        class_name = classes[label_idx]
 
-        # Plot the bounding box with the highest score
-        rect = patches.Rectangle((xmin, ymin), (xmax - xmin), (ymax - ymin), linewidth=2, edgecolor='orange', facecolor='none')
-        ax.add_patch(rect)
-        ax.text(xmin, ymin - 10, class_name, fontsize=12, color='orange', fontweight='bold')
+def letterbox(img, size=BATCH_IMAGE_SIZE):
+    """Scale a (C, H, W) tensor so its longer side is `size` and pad it to size x size
 
-    return fig, ax, class_name
+    Padding goes on the right and bottom, so boxes map back to the original
+    image by dividing by the returned scale.
+    """
+    _, height, width = img.shape
+    scale = size / max(height, width)
+    new_size = (max(1, round(height * scale)), max(1, round(width * scale)))
+    resized = torch.nn.functional.interpolate(img.unsqueeze(0), size=new_size, mode="bilinear", align_corners=False)[0]
+    padded = img.new_zeros((img.shape[0], size, size))
+    padded[:, :new_size[0], :new_size[1]] = resized
+    return padded, scale
 
-    
-def figure_to_array(fig):
 
-    fig.canvas.draw()
-    
-    return np.array(fig.canvas.renderer._renderer)
+def to_image_tensor(image):
+    """PIL image, RGB uint8 array or tensor -> (3, H, W) float tensor in [0, 1]"""
+    if torch.is_tensor(image):
+        return image
+    if isinstance(image, Image.Image):
+        image = image.convert("RGB")
+    return transforms.functional.to_tensor(image)
+
+
+def predict_batch(model, images, threshold=None, size=BATCH_IMAGE_SIZE, batch_size=None):
+    """Detections for many images, one dict per image in input order
+
+    Images are letterboxed to size x size and run batch_size at a time
+    (sized from free memory by default). Boxes are returned in each original
+    image's coordinates. With threshold=None the raw predictions are returned.
+    """
+    batch_size = batch_size or batch_size_for(size)
+    results = []
+    for start in range(0, len(images), batch_size):
+        tensors = [to_image_tensor(image) for image in images[start:start + batch_size]]
+        letterboxed = [letterbox(tensor, size) for tensor in tensors]
+        preds = predict_raw(model, torch.stack([padded for padded, _ in letterboxed]))
+
+        for pred, tensor, (_, scale) in zip(preds, tensors, letterboxed):
+            boxes = pred["boxes"] / scale
+            boxes[:, 0::2] = boxes[:, 0::2].clamp(0, tensor.shape[2])
+            boxes[:, 1::2] = boxes[:, 1::2].clamp(0, tensor.shape[1])
+            pred = dict(pred, boxes=boxes)
+            results.append(pred if threshold is None else filter_prediction(pred, threshold))
+    return results
+
+
+def image_to_array(img):
+    """(C, H, W) float tensor in [0, 1] -> writable (H, W, C) uint8 RGB array"""
+    return img.detach().cpu().clamp(0, 1).mul(255).byte().permute(1, 2, 0).contiguous().numpy()
+
+
+def class_label(label_idx):
+    label_idx = int(label_idx)
+    return classes[label_idx] if 0 <= label_idx < len(classes) else str(label_idx)
+
+
+def plot_image_from_output(img, annotation):
+    """Draw every detection's box, class and score on the image with OpenCV
+
+    `img` is a (C, H, W) tensor or an RGB uint8 array. Returns the annotated
+    RGB uint8 array and the class name of the highest-scoring detection
+    (None when there are no detections).
+    """
+    image = image_to_array(img) if torch.is_tensor(img) else np.array(img, dtype=np.uint8)
+
+    class_name = None
+
+    if annotation and "scores" in annotation and len(annotation["scores"]) > 0:
+        scores = annotation["scores"].detach().cpu().numpy()
+        boxes = annotation["boxes"].detach().cpu().numpy().round().astype(int)
+        labels = annotation["labels"].detach().cpu().numpy()
+        class_name = class_label(labels[scores.argmax()])
+
+        # Scale line width and text with the image so labels stay readable on large X-rays
+        thickness = max(2, round(max(image.shape[:2]) / 400))
+        font_scale = max(0.5, max(image.shape[:2]) / 1200)
+        for (xmin, ymin, xmax, ymax), label_idx, score in zip(boxes, labels, scores):
+            cv2.rectangle(image, (xmin, ymin), (xmax, ymax), BOX_COLOR, thickness)
+
+            text = f"{class_label(label_idx)} {score:.2f}"
+            (text_width, text_height), baseline = cv2.getTextSize(text, LABEL_FONT, font_scale, 1)
+            # Label sits above the box, or just inside it at the top edge of the image
+            top = max(ymin - text_height - baseline, 0)
+            cv2.rectangle(image, (xmin, top), (xmin + text_width, top + text_height + baseline), BOX_COLOR, cv2.FILLED)
+            cv2.putText(image, text, (xmin, top + text_height), LABEL_FONT, font_scale,
+                        LABEL_TEXT_COLOR, 1, cv2.LINE_AA)
+
+    return image, class_name
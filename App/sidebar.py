@@ -1,5 +1,6 @@
 import streamlit as st
 import random
+from onnx_backend import available_backends
 
 class Sidebar():
     def __init__(self) -> None:
@@ -7,12 +8,14 @@ class Sidebar():
         
         self.model_name = None
         self.confidence_threshold = None
+        self.backend = None
         import os
         self.title_img = os.path.join('images', 'medical.jpg')
 
         self._titleimage()
         self._model()
         self._confidencethreshold()
+        self._backend()
         
         
     def _titleimage(self):
@@ -39,6 +42,18 @@ class Sidebar():
         
         st.sidebar.markdown('## Step 2: Set a Threshold')
         self.confidence_threshold = st.sidebar.slider("Confidence Threshold", 0.00,1.00,0.5,0.01)
+
+    def _backend(self):
+
+        st.sidebar.markdown('## Step 3: Inference backend')
+
+        self.backend = st.sidebar.selectbox(
+            label = 'Run the model with',
+            options = available_backends(),
+            index = 0,
+            key = 'backend',
+            help = 'ONNX Runtime is usually faster on CPU; int8 is smaller and faster again but may be slightly less accurate. The first run exports the model.'
+        )
         
         
         
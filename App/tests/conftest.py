@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the app modules the same way the app does, from the App directory
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
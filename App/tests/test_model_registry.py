@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+import onnx_backend  # noqa: E402
+from model_registry import ModelRegistry, YOLO_WEIGHTS_PATH, build_xray_registry, registry_name  # noqa: E402
+
+
+class NoEvalModel():
+    """Stands in for an ultralytics YOLO loaded from .onnx, where eval() raises"""
+
+    def __init__(self) -> None:
+        self.warmed_up = False
+
+    def eval(self):
+        raise AssertionError("the registry must not call eval()")
+
+
+def test_get_returns_loader_model_without_eval(tmp_path):
+    weights = tmp_path / "model.pt"
+    weights.write_bytes(b"weights")
+    registry = ModelRegistry()
+    registry.register("model", str(weights), lambda path: NoEvalModel(),
+                      warmup=lambda model: setattr(model, "warmed_up", True))
+
+    model = registry.get("model")
+    assert model.warmed_up
+    assert registry.get("model") is model
+
+
+@pytest.mark.parametrize("backend", [onnx_backend.ONNX_BACKEND, onnx_backend.ONNX_INT8_BACKEND])
+def test_onnx_yolo_loads_through_registry(backend, tmp_path, monkeypatch):
+    pytest.importorskip("ultralytics")
+    pytest.importorskip("onnxruntime")
+    # Weights paths are relative to the App directory, as when the app runs
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if not os.path.exists(YOLO_WEIGHTS_PATH):
+        pytest.skip("YOLO weights not present")
+    monkeypatch.setattr(onnx_backend, "ONNX_DIR", str(tmp_path))
+
+    model = build_xray_registry().get(registry_name("YoloV8", backend))
+    images = [np.zeros((320, 320, 3), dtype=np.uint8)] * 2
+    results = model.predict(images, conf=0.01, verbose=False)
+    assert len(results) == 2
@@ -0,0 +1,37 @@
+import contextlib
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("gtts")
+
+import tts_stream  # noqa: E402
+
+ANSWER = " ".join(f"Sentence number {i} of the answer is long enough to be spoken." for i in range(6))
+
+
+@pytest.fixture
+def audio_calls(monkeypatch):
+    calls = []
+    # Each segment "plays" for 5 s, so later sentences queue behind the first
+    monkeypatch.setattr(tts_stream, "synthesize_segment",
+                        lambda text, lang_code: bytes(5 * tts_stream.GTTS_BITRATE // 8))
+    monkeypatch.setattr(tts_stream.st, "audio", lambda data, **kwargs: calls.append((data, kwargs)))
+    return calls
+
+
+def test_follow_up_clip_autoplays(audio_calls):
+    tts_stream.speak_text(ANSWER, "en", contextlib.nullcontext())
+
+    assert len(audio_calls) == 2
+    assert all(kwargs.get("autoplay") is True for _, kwargs in audio_calls)
+
+
+def test_follow_up_clip_waits_for_first_segment(audio_calls):
+    tts_stream.speak_text(ANSWER, "en", contextlib.nullcontext())
+
+    first, follow_up = audio_calls[0][0], audio_calls[1][0]
+    segments = len(tts_stream.split_sentences(ANSWER))
+    lead = follow_up[:len(follow_up) - (segments - 1) * len(first)]
+    assert lead and set(lead[:len(tts_stream.SILENT_FRAME)]) == set(tts_stream.SILENT_FRAME)
+    assert tts_stream.mp3_seconds(lead) == pytest.approx(tts_stream.mp3_seconds(first), abs=0.5)
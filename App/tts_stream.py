@@ -0,0 +1,170 @@
+import math
+import re
+import time
+from io import BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from gtts import gTTS
+
+# Sentence ends: Latin punctuation plus the Devanagari danda used by Hindi/Marathi
+SENTENCE_END = re.compile(r'(?<=[.!?।])\s+|\n{2,}')
+
+# Very short fragments ("1.", "Dr.") are merged with the next sentence
+MIN_SEGMENT_CHARS = 40
+
+TTS_STREAM_WORKERS = 3
+
+# gTTS returns 32 kbps, 24 kHz mono MP3 (MPEG-2 Layer III). A frame with an empty
+# side-info block decodes to 24 ms of silence and is used to delay follow-up clips.
+GTTS_BITRATE = 32000
+SILENT_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC0]) + bytes(92)
+SILENT_FRAME_SECONDS = 576 / 24000
+
+# Queued sentences are played this long before the current clip ends
+FOLLOW_UP_LEAD_SECONDS = 1.0
+
+
+def split_sentences(text):
+    """Split text into speakable segments of at least MIN_SEGMENT_CHARS"""
+    segments = []
+    current = ""
+    for part in SENTENCE_END.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        current = f"{current} {part}" if current else part
+        if len(current) >= MIN_SEGMENT_CHARS:
+            segments.append(current)
+            current = ""
+    if current:
+        segments.append(current)
+    return segments
+
+
+def synthesize_segment(text, lang_code):
+    """gTTS one segment into MP3 bytes (runs on worker threads, no UI calls)"""
+    audio_buffer = BytesIO()
+    gTTS(text=text, lang=lang_code).write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+
+class SpeechStream():
+    """Incremental sentence-level TTS pipeline.
+
+    Text is fed in chunks (e.g. straight from a streamed LLM response); every
+    complete sentence is submitted to a worker pool right away and finished
+    segments are handed back strictly in text order.
+    """
+
+    def __init__(self, lang_code, workers=TTS_STREAM_WORKERS) -> None:
+        self.lang_code = lang_code
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-stream")
+        self._futures = deque()
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """Add text and queue synthesis for any sentences it completes"""
+        self._buffer += chunk
+        segments = split_sentences(self._buffer)
+        # The last segment may still be growing, keep it until more text (or close)
+        self._buffer = segments.pop() if segments else ""
+        for segment in segments:
+            self._submit(segment)
+
+    def close(self):
+        """Flush the trailing partial sentence; no more text will be fed"""
+        if self._buffer.strip():
+            self._submit(self._buffer.strip())
+        self._buffer = ""
+        self._executor.shutdown(wait=False)
+
+    def _submit(self, segment):
+        self._futures.append(self._executor.submit(synthesize_segment, segment, self.lang_code))
+
+    def ready_segments(self):
+        """Yield finished segments in order without blocking on unfinished ones"""
+        while self._futures and self._futures[0].done():
+            yield self._result(self._futures.popleft())
+
+    def remaining_segments(self):
+        """Yield all outstanding segments in order, waiting for each"""
+        while self._futures:
+            yield self._result(self._futures.popleft())
+
+    def _result(self, future):
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"TTS segment error: {e}")
+            return None
+
+
+def mp3_seconds(audio_bytes):
+    """Playing time of gTTS output (constant GTTS_BITRATE MP3)"""
+    return len(audio_bytes) * 8 / GTTS_BITRATE
+
+
+def silence(seconds):
+    """MP3 silence long enough to cover `seconds`, in gTTS's frame format"""
+    return SILENT_FRAME * math.ceil(max(seconds, 0.0) / SILENT_FRAME_SECONDS)
+
+
+def _play(audio_bytes, container, state):
+    """Autoplay a clip that starts when the previously queued speech ends
+
+    Each player starts as soon as it is rendered, so the clip is led by
+    silence for whatever is still playing; MP3 frames concatenate cleanly.
+    """
+    remaining = max(state["playing_until"] - time.monotonic(), 0.0)
+    clip = silence(remaining) + audio_bytes if remaining else audio_bytes
+    with container:
+        st.audio(clip, format="audio/mp3", autoplay=True)
+    state["playing_until"] = time.monotonic() + mp3_seconds(clip)
+
+
+def _render_segments(segments, container, state):
+    """Queue finished segments; play them once the speech already queued is about to end
+
+    The first segment plays immediately. Later ones are joined into one
+    follow-up clip per gap, so a long answer renders a few players, not one per sentence.
+    """
+    for audio_bytes in segments:
+        if audio_bytes is not None:
+            state["pending"].append(audio_bytes)
+        if state["pending"] and time.monotonic() >= state["playing_until"] - FOLLOW_UP_LEAD_SECONDS:
+            _render_follow_up(container, state)
+
+
+def _render_follow_up(container, state):
+    """Play everything still queued as one autoplaying clip"""
+    if state["pending"]:
+        _play(b"".join(state["pending"]), container, state)
+        state["pending"] = []
+
+
+def speak_while_streaming(chunks, lang_code, container):
+    """Pass text chunks through unchanged (e.g. into st.write_stream) while speaking them.
+
+    Speech for the first sentence starts playing in `container` while the LLM
+    is still generating and later sentences are still being synthesized; the
+    rest of the answer follows in autoplaying clips queued behind it.
+    """
+    stream = SpeechStream(lang_code)
+    state = {"pending": [], "playing_until": 0.0}
+    try:
+        for chunk in chunks:
+            stream.feed(chunk)
+            _render_segments(stream.ready_segments(), container, state)
+            yield chunk
+    finally:
+        stream.close()
+    _render_segments(stream.remaining_segments(), container, state)
+    _render_follow_up(container, state)
+
+
+def speak_text(text, lang_code, container):
+    """Sentence-streamed TTS for text that is already complete"""
+    for _ in speak_while_streaming([text], lang_code, container):
+        pass
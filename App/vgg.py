@@ -1,4 +1,5 @@
 
+import os
 import torch
 import torchvision
 import torch.nn as nn
@@ -48,9 +49,9 @@ def create_model(num_classes):
     model.to('cpu')
     return model
 
-def get_vgg_model():
+def get_vgg_model(model_path=os.path.join("weights", "model_vgg.pt")):
     model = create_model(num_classes=num_classes)
-    checkpoint = torch.load('weights\model_vgg.pt', map_location='cpu')
+    checkpoint = torch.load(model_path, map_location='cpu')
     model.load_state_dict(checkpoint)
     
     return model